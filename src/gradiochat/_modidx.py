@@ -5,20 +5,74 @@ d = { 'settings': { 'branch': 'main',
                 'doc_host': 'https://Hopsakee.github.io',
                 'git_url': 'https://github.com/Hopsakee/gradiochat',
                 'lib_path': 'src/gradiochat'},
-  'syms': { 'gradiochat.app': { 'gradiochat.app.BaseChatApp': ('app.html#basechatapp', 'gradiochat/app.py'),
+  'syms': { 'gradiochat.api': { 'gradiochat.api._dumps': ('api.html#_dumps', 'gradiochat/api.py'),
+                                'gradiochat.api._error': ('api.html#_error', 'gradiochat/api.py'),
+                                'gradiochat.api.create_api': ('api.html#create_api', 'gradiochat/api.py'),
+                                'gradiochat.api.create_api_from_env': ('api.html#create_api_from_env', 'gradiochat/api.py')},
+            'gradiochat.app': { 'gradiochat.app.AsyncLLMClientProtocol': ('app.html#asyncllmclientprotocol', 'gradiochat/app.py'),
+                                'gradiochat.app.AsyncLLMClientProtocol.achat_completion': ( 'app.html#asyncllmclientprotocol.achat_completion',
+                                                                                            'gradiochat/app.py'),
+                                'gradiochat.app.AsyncLLMClientProtocol.achat_completion_stream': ( 'app.html#asyncllmclientprotocol.achat_completion_stream',
+                                                                                                   'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp': ('app.html#basechatapp', 'gradiochat/app.py'),
                                 'gradiochat.app.BaseChatApp.__init__': ('app.html#basechatapp.__init__', 'gradiochat/app.py'),
-                                'gradiochat.app.BaseChatApp._load_context': ('app.html#basechatapp._load_context', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._aload_and_stream': ( 'app.html#basechatapp._aload_and_stream',
+                                                                                  'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._asemantic_replay': ( 'app.html#basechatapp._asemantic_replay',
+                                                                                  'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._asemantic_store': ( 'app.html#basechatapp._asemantic_store',
+                                                                                 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._background_refresh': ( 'app.html#basechatapp._background_refresh',
+                                                                                    'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._messages': ('app.html#basechatapp._messages', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._prepare': ('app.html#basechatapp._prepare', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._refresh_soon': ('app.html#basechatapp._refresh_soon', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._semantic_get': ('app.html#basechatapp._semantic_get', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._semantic_replay': ( 'app.html#basechatapp._semantic_replay',
+                                                                                 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._semantic_store': ('app.html#basechatapp._semantic_store', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp._state': ('app.html#basechatapp._state', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.agenerate_response': ( 'app.html#basechatapp.agenerate_response',
+                                                                                   'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.agenerate_stream': ( 'app.html#basechatapp.agenerate_stream',
+                                                                                 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.arefresh_context': ( 'app.html#basechatapp.arefresh_context',
+                                                                                 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.context_for': ('app.html#basechatapp.context_for', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.context_text': ('app.html#basechatapp.context_text', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.estimate_tokens': ('app.html#basechatapp.estimate_tokens', 'gradiochat/app.py'),
                                 'gradiochat.app.BaseChatApp.generate_response': ( 'app.html#basechatapp.generate_response',
                                                                                   'gradiochat/app.py'),
                                 'gradiochat.app.BaseChatApp.generate_stream': ('app.html#basechatapp.generate_stream', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.log_turn': ('app.html#basechatapp.log_turn', 'gradiochat/app.py'),
                                 'gradiochat.app.BaseChatApp.prepare_messages': ( 'app.html#basechatapp.prepare_messages',
                                                                                  'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.refresh_context': ('app.html#basechatapp.refresh_context', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.semantic_query': ('app.html#basechatapp.semantic_query', 'gradiochat/app.py'),
+                                'gradiochat.app.BaseChatApp.system_content': ('app.html#basechatapp.system_content', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry': ('app.html#clientregistry', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry.__init__': ('app.html#clientregistry.__init__', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry.__len__': ('app.html#clientregistry.__len__', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry._create': ('app.html#clientregistry._create', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry.clear': ('app.html#clientregistry.clear', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry.get': ('app.html#clientregistry.get', 'gradiochat/app.py'),
+                                'gradiochat.app.ClientRegistry.http_options': ('app.html#clientregistry.http_options', 'gradiochat/app.py'),
                                 'gradiochat.app.HuggingFaceClient': ('app.html#huggingfaceclient', 'gradiochat/app.py'),
                                 'gradiochat.app.HuggingFaceClient.__init__': ('app.html#huggingfaceclient.__init__', 'gradiochat/app.py'),
+                                'gradiochat.app.HuggingFaceClient._completion_params': ( 'app.html#huggingfaceclient._completion_params',
+                                                                                         'gradiochat/app.py'),
+                                'gradiochat.app.HuggingFaceClient._stream_params': ( 'app.html#huggingfaceclient._stream_params',
+                                                                                     'gradiochat/app.py'),
+                                'gradiochat.app.HuggingFaceClient.achat_completion': ( 'app.html#huggingfaceclient.achat_completion',
+                                                                                       'gradiochat/app.py'),
+                                'gradiochat.app.HuggingFaceClient.achat_completion_stream': ( 'app.html#huggingfaceclient.achat_completion_stream',
+                                                                                              'gradiochat/app.py'),
                                 'gradiochat.app.HuggingFaceClient.chat_completion': ( 'app.html#huggingfaceclient.chat_completion',
                                                                                       'gradiochat/app.py'),
                                 'gradiochat.app.HuggingFaceClient.chat_completion_stream': ( 'app.html#huggingfaceclient.chat_completion_stream',
                                                                                              'gradiochat/app.py'),
+                                'gradiochat.app.HuggingFaceClient.health_check': ( 'app.html#huggingfaceclient.health_check',
+                                                                                   'gradiochat/app.py'),
                                 'gradiochat.app.LLMClientProtocol': ('app.html#llmclientprotocol', 'gradiochat/app.py'),
                                 'gradiochat.app.LLMClientProtocol.chat_completion': ( 'app.html#llmclientprotocol.chat_completion',
                                                                                       'gradiochat/app.py'),
@@ -26,30 +80,441 @@ d = { 'settings': { 'branch': 'main',
                                                                                              'gradiochat/app.py'),
                                 'gradiochat.app.OllamaClient': ('app.html#ollamaclient', 'gradiochat/app.py'),
                                 'gradiochat.app.OllamaClient.__init__': ('app.html#ollamaclient.__init__', 'gradiochat/app.py'),
+                                'gradiochat.app.OllamaClient._chat_params': ('app.html#ollamaclient._chat_params', 'gradiochat/app.py'),
+                                'gradiochat.app.OllamaClient._record_usage': ('app.html#ollamaclient._record_usage', 'gradiochat/app.py'),
+                                'gradiochat.app.OllamaClient.achat_completion': ( 'app.html#ollamaclient.achat_completion',
+                                                                                  'gradiochat/app.py'),
+                                'gradiochat.app.OllamaClient.achat_completion_stream': ( 'app.html#ollamaclient.achat_completion_stream',
+                                                                                         'gradiochat/app.py'),
                                 'gradiochat.app.OllamaClient.chat_completion': ( 'app.html#ollamaclient.chat_completion',
                                                                                  'gradiochat/app.py'),
                                 'gradiochat.app.OllamaClient.chat_completion_stream': ( 'app.html#ollamaclient.chat_completion_stream',
                                                                                         'gradiochat/app.py'),
+                                'gradiochat.app.OllamaClient.health_check': ('app.html#ollamaclient.health_check', 'gradiochat/app.py'),
+                                'gradiochat.app.PromptCacheStats': ('app.html#promptcachestats', 'gradiochat/app.py'),
+                                'gradiochat.app.PromptCacheStats.__init__': ('app.html#promptcachestats.__init__', 'gradiochat/app.py'),
+                                'gradiochat.app.PromptCacheStats.hit_rate': ('app.html#promptcachestats.hit_rate', 'gradiochat/app.py'),
+                                'gradiochat.app.PromptCacheStats.record': ('app.html#promptcachestats.record', 'gradiochat/app.py'),
+                                'gradiochat.app.PromptCacheStats.record_openai_usage': ( 'app.html#promptcachestats.record_openai_usage',
+                                                                                         'gradiochat/app.py'),
                                 'gradiochat.app.TogetherAiClient': ('app.html#togetheraiclient', 'gradiochat/app.py'),
                                 'gradiochat.app.TogetherAiClient.__init__': ('app.html#togetheraiclient.__init__', 'gradiochat/app.py'),
+                                'gradiochat.app.TogetherAiClient._completion_params': ( 'app.html#togetheraiclient._completion_params',
+                                                                                        'gradiochat/app.py'),
+                                'gradiochat.app.TogetherAiClient._stream_params': ( 'app.html#togetheraiclient._stream_params',
+                                                                                    'gradiochat/app.py'),
+                                'gradiochat.app.TogetherAiClient.achat_completion': ( 'app.html#togetheraiclient.achat_completion',
+                                                                                      'gradiochat/app.py'),
+                                'gradiochat.app.TogetherAiClient.achat_completion_stream': ( 'app.html#togetheraiclient.achat_completion_stream',
+                                                                                             'gradiochat/app.py'),
                                 'gradiochat.app.TogetherAiClient.chat_completion': ( 'app.html#togetheraiclient.chat_completion',
                                                                                      'gradiochat/app.py'),
                                 'gradiochat.app.TogetherAiClient.chat_completion_stream': ( 'app.html#togetheraiclient.chat_completion_stream',
                                                                                             'gradiochat/app.py'),
+                                'gradiochat.app.TogetherAiClient.health_check': ( 'app.html#togetheraiclient.health_check',
+                                                                                  'gradiochat/app.py'),
+                                'gradiochat.app._LoopClient': ('app.html#_loopclient', 'gradiochat/app.py'),
+                                'gradiochat.app._LoopClient.__getattr__': ('app.html#_loopclient.__getattr__', 'gradiochat/app.py'),
+                                'gradiochat.app._LoopClient.__init__': ('app.html#_loopclient.__init__', 'gradiochat/app.py'),
+                                'gradiochat.app._LoopClient.for_loop': ('app.html#_loopclient.for_loop', 'gradiochat/app.py'),
                                 'gradiochat.app.create_llm_client': ('app.html#create_llm_client', 'gradiochat/app.py')},
-            'gradiochat.config': { 'gradiochat.config.ChatAppConfig': ('config.html#chatappconfig', 'gradiochat/config.py'),
+            'gradiochat.batch': { 'gradiochat.batch.BatchProgress': ('batch.html#batchprogress', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.BatchProgress.__init__': ('batch.html#batchprogress.__init__', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.BatchProgress.__str__': ('batch.html#batchprogress.__str__', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.BatchProgress.elapsed': ('batch.html#batchprogress.elapsed', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.BatchProgress.rate': ('batch.html#batchprogress.rate', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.BatchProgress.tokens_per_second': ( 'batch.html#batchprogress.tokens_per_second',
+                                                                                        'gradiochat/batch.py'),
+                                  'gradiochat.batch.arun_batch': ('batch.html#arun_batch', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.completed_ids': ('batch.html#completed_ids', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.parse_conversation': ('batch.html#parse_conversation', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.print_progress': ('batch.html#print_progress', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.read_conversations': ('batch.html#read_conversations', 'gradiochat/batch.py'),
+                                  'gradiochat.batch.run_batch': ('batch.html#run_batch', 'gradiochat/batch.py')},
+            'gradiochat.bench': { 'gradiochat.bench.StubConfig': ('bench.html#stubconfig', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer': ('bench.html#stubserver', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.__enter__': ('bench.html#stubserver.__enter__', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.__exit__': ('bench.html#stubserver.__exit__', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.__init__': ('bench.html#stubserver.__init__', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.model_config': ('bench.html#stubserver.model_config', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.start': ('bench.html#stubserver.start', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.stop': ('bench.html#stubserver.stop', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.StubServer.url': ('bench.html#stubserver.url', 'gradiochat/bench.py'),
+                                  'gradiochat.bench._history': ('bench.html#_history', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.app_request': ('bench.html#app_request', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.bench_main': ('bench.html#bench_main', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.create_stub_app': ('bench.html#create_stub_app', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.format_results': ('bench.html#format_results', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.measure': ('bench.html#measure', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.run_benchmarks': ('bench.html#run_benchmarks', 'gradiochat/bench.py'),
+                                  'gradiochat.bench.ui_request': ('bench.html#ui_request', 'gradiochat/bench.py')},
+            'gradiochat.cache': { 'gradiochat.cache.CachedClient': ('cache.html#cachedclient', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient.__init__': ('cache.html#cachedclient.__init__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient._key': ('cache.html#cachedclient._key', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient._lookup': ('cache.html#cachedclient._lookup', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient._replay': ('cache.html#cachedclient._replay', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient.achat_completion': ( 'cache.html#cachedclient.achat_completion',
+                                                                                      'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient.achat_completion_stream': ( 'cache.html#cachedclient.achat_completion_stream',
+                                                                                             'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient.chat_completion': ( 'cache.html#cachedclient.chat_completion',
+                                                                                     'gradiochat/cache.py'),
+                                  'gradiochat.cache.CachedClient.chat_completion_stream': ( 'cache.html#cachedclient.chat_completion_stream',
+                                                                                            'gradiochat/cache.py'),
+                                  'gradiochat.cache.MemoryCache': ('cache.html#memorycache', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.MemoryCache.__init__': ('cache.html#memorycache.__init__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.MemoryCache.__len__': ('cache.html#memorycache.__len__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.MemoryCache.clear': ('cache.html#memorycache.clear', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.MemoryCache.get': ('cache.html#memorycache.get', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.MemoryCache.set': ('cache.html#memorycache.set', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SQLiteCache': ('cache.html#sqlitecache', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SQLiteCache.__init__': ('cache.html#sqlitecache.__init__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SQLiteCache.__len__': ('cache.html#sqlitecache.__len__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SQLiteCache.clear': ('cache.html#sqlitecache.clear', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SQLiteCache.get': ('cache.html#sqlitecache.get', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SQLiteCache.set': ('cache.html#sqlitecache.set', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache': ('cache.html#semanticcache', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.__init__': ('cache.html#semanticcache.__init__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.__len__': ('cache.html#semanticcache.__len__', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache._free': ('cache.html#semanticcache._free', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.clear': ('cache.html#semanticcache.clear', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.get': ('cache.html#semanticcache.get', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.invalidate': ( 'cache.html#semanticcache.invalidate',
+                                                                                 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.set': ('cache.html#semanticcache.set', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.SemanticCache.vector': ('cache.html#semanticcache.vector', 'gradiochat/cache.py'),
+                                  'gradiochat.cache._normalize': ('cache.html#_normalize', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.completion_cache_key': ('cache.html#completion_cache_key', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.get_cache': ('cache.html#get_cache', 'gradiochat/cache.py'),
+                                  'gradiochat.cache.hashing_vector': ('cache.html#hashing_vector', 'gradiochat/cache.py')},
+            'gradiochat.config': { 'gradiochat.config.CacheConfig': ('config.html#cacheconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.ChatAppConfig': ('config.html#chatappconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.ChatMessage': ('config.html#chatmessage', 'gradiochat/config.py'),
+                                   'gradiochat.config.ChatMessage.__init__': ('config.html#chatmessage.__init__', 'gradiochat/config.py'),
+                                   'gradiochat.config.ChatMessage.content': ('config.html#chatmessage.content', 'gradiochat/config.py'),
+                                   'gradiochat.config.ChatMessage.role': ('config.html#chatmessage.role', 'gradiochat/config.py'),
+                                   'gradiochat.config.ConversationLogConfig': ('config.html#conversationlogconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.HostConfig': ('config.html#hostconfig', 'gradiochat/config.py'),
                                    'gradiochat.config.Message': ('config.html#message', 'gradiochat/config.py'),
                                    'gradiochat.config.ModelConfig': ('config.html#modelconfig', 'gradiochat/config.py'),
-                                   'gradiochat.config.ModelConfig.api_key': ('config.html#modelconfig.api_key', 'gradiochat/config.py')},
+                                   'gradiochat.config.ModelConfig.api_key': ('config.html#modelconfig.api_key', 'gradiochat/config.py'),
+                                   'gradiochat.config.RetrievalConfig': ('config.html#retrievalconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.RoutingConfig': ('config.html#routingconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.SchedulerConfig': ('config.html#schedulerconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.SemanticCacheConfig': ('config.html#semanticcacheconfig', 'gradiochat/config.py'),
+                                   'gradiochat.config.message_dicts': ('config.html#message_dicts', 'gradiochat/config.py')},
+            'gradiochat.context': { 'gradiochat.context.ContextFiles': ('context.html#contextfiles', 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles.__init__': ( 'context.html#contextfiles.__init__',
+                                                                                  'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles._check': ('context.html#contextfiles._check', 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles._due': ('context.html#contextfiles._due', 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles._read': ('context.html#contextfiles._read', 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles._update': ( 'context.html#contextfiles._update',
+                                                                                 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles.current': ( 'context.html#contextfiles.current',
+                                                                                 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles.digest': ('context.html#contextfiles.digest', 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles.due': ('context.html#contextfiles.due', 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles.refresh': ( 'context.html#contextfiles.refresh',
+                                                                                 'gradiochat/context.py'),
+                                    'gradiochat.context.ContextFiles.text': ('context.html#contextfiles.text', 'gradiochat/context.py')},
+            'gradiochat.conversation_log': { 'gradiochat.conversation_log.ConversationLog': ( 'conversation_log.html#conversationlog',
+                                                                                              'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.__init__': ( 'conversation_log.html#conversationlog.__init__',
+                                                                                                       'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog._close': ( 'conversation_log.html#conversationlog._close',
+                                                                                                     'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog._open': ( 'conversation_log.html#conversationlog._open',
+                                                                                                    'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog._run': ( 'conversation_log.html#conversationlog._run',
+                                                                                                   'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog._write': ( 'conversation_log.html#conversationlog._write',
+                                                                                                     'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.append': ( 'conversation_log.html#conversationlog.append',
+                                                                                                     'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.close': ( 'conversation_log.html#conversationlog.close',
+                                                                                                    'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.conversation': ( 'conversation_log.html#conversationlog.conversation',
+                                                                                                           'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.flush': ( 'conversation_log.html#conversationlog.flush',
+                                                                                                    'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.pending': ( 'conversation_log.html#conversationlog.pending',
+                                                                                                      'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.sessions': ( 'conversation_log.html#conversationlog.sessions',
+                                                                                                       'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.ConversationLog.turns': ( 'conversation_log.html#conversationlog.turns',
+                                                                                                    'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.JsonlConversationLog': ( 'conversation_log.html#jsonlconversationlog',
+                                                                                                   'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.JsonlConversationLog._close': ( 'conversation_log.html#jsonlconversationlog._close',
+                                                                                                          'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.JsonlConversationLog._open': ( 'conversation_log.html#jsonlconversationlog._open',
+                                                                                                         'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.JsonlConversationLog._scan': ( 'conversation_log.html#jsonlconversationlog._scan',
+                                                                                                         'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.JsonlConversationLog._write': ( 'conversation_log.html#jsonlconversationlog._write',
+                                                                                                          'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.JsonlConversationLog.turns': ( 'conversation_log.html#jsonlconversationlog.turns',
+                                                                                                         'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.SQLiteConversationLog': ( 'conversation_log.html#sqliteconversationlog',
+                                                                                                    'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.SQLiteConversationLog._close': ( 'conversation_log.html#sqliteconversationlog._close',
+                                                                                                           'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.SQLiteConversationLog._open': ( 'conversation_log.html#sqliteconversationlog._open',
+                                                                                                          'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.SQLiteConversationLog._write': ( 'conversation_log.html#sqliteconversationlog._write',
+                                                                                                           'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.SQLiteConversationLog.sessions': ( 'conversation_log.html#sqliteconversationlog.sessions',
+                                                                                                             'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.SQLiteConversationLog.turns': ( 'conversation_log.html#sqliteconversationlog.turns',
+                                                                                                          'gradiochat/conversation_log.py'),
+                                             'gradiochat.conversation_log.get_conversation_log': ( 'conversation_log.html#get_conversation_log',
+                                                                                                   'gradiochat/conversation_log.py')},
             'gradiochat.gradio_configpresets': {},
-            'gradiochat.gradio_themebuilder': {},
+            'gradiochat.gradio_themebuilder': { 'gradiochat.gradio_themebuilder.start_theme_builder': ( 'gradio_themesbuilder.html#start_theme_builder',
+                                                                                                        'gradiochat/gradio_themebuilder.py')},
             'gradiochat.gradio_themes': {},
+            'gradiochat.hedging': { 'gradiochat.hedging.HedgeStats': ('hedging.html#hedgestats', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgeStats.__init__': ('hedging.html#hedgestats.__init__', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgeStats.hedge_rate': ( 'hedging.html#hedgestats.hedge_rate',
+                                                                                  'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgeStats.record': ('hedging.html#hedgestats.record', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgeStats.win_rate': ('hedging.html#hedgestats.win_rate', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient': ('hedging.html#hedgedclient', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.__getattr__': ( 'hedging.html#hedgedclient.__getattr__',
+                                                                                     'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.__init__': ( 'hedging.html#hedgedclient.__init__',
+                                                                                  'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient._race': ('hedging.html#hedgedclient._race', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.achat_completion': ( 'hedging.html#hedgedclient.achat_completion',
+                                                                                          'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.achat_completion_stream': ( 'hedging.html#hedgedclient.achat_completion_stream',
+                                                                                                 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.chat_completion': ( 'hedging.html#hedgedclient.chat_completion',
+                                                                                         'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.chat_completion_stream': ( 'hedging.html#hedgedclient.chat_completion_stream',
+                                                                                                'gradiochat/hedging.py'),
+                                    'gradiochat.hedging.HedgedClient.delay': ('hedging.html#hedgedclient.delay', 'gradiochat/hedging.py'),
+                                    'gradiochat.hedging._close': ('hedging.html#_close', 'gradiochat/hedging.py')},
+            'gradiochat.host': { 'gradiochat.host.ChatHost': ('host.html#chathost', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost.__init__': ('host.html#chathost.__init__', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost._lifespan': ('host.html#chathost._lifespan', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost._start': ('host.html#chathost._start', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost.built': ('host.html#chathost.built', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost.chat': ('host.html#chathost.chat', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost.index': ('host.html#chathost.index', 'gradiochat/host.py'),
+                                 'gradiochat.host.ChatHost.launch': ('host.html#chathost.launch', 'gradiochat/host.py'),
+                                 'gradiochat.host._LazyGradioApp': ('host.html#_lazygradioapp', 'gradiochat/host.py'),
+                                 'gradiochat.host._LazyGradioApp.__call__': ('host.html#_lazygradioapp.__call__', 'gradiochat/host.py'),
+                                 'gradiochat.host._LazyGradioApp.__init__': ('host.html#_lazygradioapp.__init__', 'gradiochat/host.py')},
+            'gradiochat.metrics': { 'gradiochat.metrics.PrometheusMetrics': ('metrics.html#prometheusmetrics', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.PrometheusMetrics.__call__': ( 'metrics.html#prometheusmetrics.__call__',
+                                                                                       'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.PrometheusMetrics.__init__': ( 'metrics.html#prometheusmetrics.__init__',
+                                                                                       'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.PrometheusMetrics._labels': ( 'metrics.html#prometheusmetrics._labels',
+                                                                                      'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.PrometheusMetrics.render': ( 'metrics.html#prometheusmetrics.render',
+                                                                                     'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics': ('metrics.html#requestmetrics', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.__init__': ( 'metrics.html#requestmetrics.__init__',
+                                                                                    'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.as_dict': ( 'metrics.html#requestmetrics.as_dict',
+                                                                                   'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.chunk': ( 'metrics.html#requestmetrics.chunk',
+                                                                                 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.finish': ( 'metrics.html#requestmetrics.finish',
+                                                                                  'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.prepared': ( 'metrics.html#requestmetrics.prepared',
+                                                                                    'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.tokens_per_second': ( 'metrics.html#requestmetrics.tokens_per_second',
+                                                                                             'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.RequestMetrics.tokens_saved': ( 'metrics.html#requestmetrics.tokens_saved',
+                                                                                        'gradiochat/metrics.py'),
+                                    'gradiochat.metrics._Histogram': ('metrics.html#_histogram', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics._Histogram.__init__': ('metrics.html#_histogram.__init__', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics._Histogram.lines': ('metrics.html#_histogram.lines', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics._Histogram.observe': ('metrics.html#_histogram.observe', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics._expected_chunks': ('metrics.html#_expected_chunks', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.add_metrics_hook': ('metrics.html#add_metrics_hook', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.ainstrument_stream': ('metrics.html#ainstrument_stream', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.emit': ('metrics.html#emit', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.instrument_stream': ('metrics.html#instrument_stream', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.mount_metrics': ('metrics.html#mount_metrics', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.percentile': ('metrics.html#percentile', 'gradiochat/metrics.py'),
+                                    'gradiochat.metrics.remove_metrics_hook': ( 'metrics.html#remove_metrics_hook',
+                                                                                'gradiochat/metrics.py')},
+            'gradiochat.policy': { 'gradiochat.policy.ConcurrencyLimiter': ('policy.html#concurrencylimiter', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter.__init__': ( 'policy.html#concurrencylimiter.__init__',
+                                                                                      'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter._enqueue': ( 'policy.html#concurrencylimiter._enqueue',
+                                                                                      'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter._withdraw': ( 'policy.html#concurrencylimiter._withdraw',
+                                                                                       'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter.aacquire': ( 'policy.html#concurrencylimiter.aacquire',
+                                                                                      'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter.acquire': ( 'policy.html#concurrencylimiter.acquire',
+                                                                                     'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter.queued': ( 'policy.html#concurrencylimiter.queued',
+                                                                                    'gradiochat/policy.py'),
+                                   'gradiochat.policy.ConcurrencyLimiter.release': ( 'policy.html#concurrencylimiter.release',
+                                                                                     'gradiochat/policy.py'),
+                                   'gradiochat.policy.FirstTokenTimeout': ('policy.html#firsttokentimeout', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient': ('policy.html#policyclient', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient.__getattr__': ( 'policy.html#policyclient.__getattr__',
+                                                                                   'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient.__init__': ('policy.html#policyclient.__init__', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient._aslot': ('policy.html#policyclient._aslot', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient._delay': ('policy.html#policyclient._delay', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient._first': ('policy.html#policyclient._first', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient._give_up': ('policy.html#policyclient._give_up', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient._slot': ('policy.html#policyclient._slot', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient.achat_completion': ( 'policy.html#policyclient.achat_completion',
+                                                                                        'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient.achat_completion_stream': ( 'policy.html#policyclient.achat_completion_stream',
+                                                                                               'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient.chat_completion': ( 'policy.html#policyclient.chat_completion',
+                                                                                       'gradiochat/policy.py'),
+                                   'gradiochat.policy.PolicyClient.chat_completion_stream': ( 'policy.html#policyclient.chat_completion_stream',
+                                                                                              'gradiochat/policy.py'),
+                                   'gradiochat.policy.ProviderBusyError': ('policy.html#providerbusyerror', 'gradiochat/policy.py'),
+                                   'gradiochat.policy._grant': ('policy.html#_grant', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.get_limiter': ('policy.html#get_limiter', 'gradiochat/policy.py'),
+                                   'gradiochat.policy.is_retryable': ('policy.html#is_retryable', 'gradiochat/policy.py')},
+            'gradiochat.retrieval': { 'gradiochat.retrieval.BM25Index': ('retrieval.html#bm25index', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.BM25Index.__init__': ( 'retrieval.html#bm25index.__init__',
+                                                                                   'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.BM25Index._idf': ('retrieval.html#bm25index._idf', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.BM25Index.load': ('retrieval.html#bm25index.load', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.BM25Index.save': ('retrieval.html#bm25index.save', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.BM25Index.search': ( 'retrieval.html#bm25index.search',
+                                                                                 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval._tokenize': ('retrieval.html#_tokenize', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.build_index': ('retrieval.html#build_index', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.chunk_markdown': ('retrieval.html#chunk_markdown', 'gradiochat/retrieval.py'),
+                                      'gradiochat.retrieval.files_fingerprint': ( 'retrieval.html#files_fingerprint',
+                                                                                  'gradiochat/retrieval.py')},
+            'gradiochat.routing': { 'gradiochat.routing.Endpoint': ('routing.html#endpoint', 'gradiochat/routing.py'),
+                                    'gradiochat.routing.Endpoint.__init__': ('routing.html#endpoint.__init__', 'gradiochat/routing.py'),
+                                    'gradiochat.routing.Endpoint.state': ('routing.html#endpoint.state', 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient': ('routing.html#routingclient', 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.__init__': ( 'routing.html#routingclient.__init__',
+                                                                                   'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient._begin': ( 'routing.html#routingclient._begin',
+                                                                                 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient._end': ('routing.html#routingclient._end', 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient._failed': ( 'routing.html#routingclient._failed',
+                                                                                  'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient._health_loop': ( 'routing.html#routingclient._health_loop',
+                                                                                       'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient._order': ( 'routing.html#routingclient._order',
+                                                                                 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient._succeeded': ( 'routing.html#routingclient._succeeded',
+                                                                                     'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.achat_completion': ( 'routing.html#routingclient.achat_completion',
+                                                                                           'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.achat_completion_stream': ( 'routing.html#routingclient.achat_completion_stream',
+                                                                                                  'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.candidates': ( 'routing.html#routingclient.candidates',
+                                                                                     'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.chat_completion': ( 'routing.html#routingclient.chat_completion',
+                                                                                          'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.chat_completion_stream': ( 'routing.html#routingclient.chat_completion_stream',
+                                                                                                 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.check_health': ( 'routing.html#routingclient.check_health',
+                                                                                       'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.close': ('routing.html#routingclient.close', 'gradiochat/routing.py'),
+                                    'gradiochat.routing.RoutingClient.stats': ( 'routing.html#routingclient.stats',
+                                                                                'gradiochat/routing.py')},
+            'gradiochat.scheduler': { 'gradiochat.scheduler.FairScheduler': ('scheduler.html#fairscheduler', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.__init__': ( 'scheduler.html#fairscheduler.__init__',
+                                                                                       'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler._bucket': ( 'scheduler.html#fairscheduler._bucket',
+                                                                                      'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler._release': ( 'scheduler.html#fairscheduler._release',
+                                                                                       'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler._start': ( 'scheduler.html#fairscheduler._start',
+                                                                                     'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.aslot': ( 'scheduler.html#fairscheduler.aslot',
+                                                                                    'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.expire': ( 'scheduler.html#fairscheduler.expire',
+                                                                                     'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.position': ( 'scheduler.html#fairscheduler.position',
+                                                                                       'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.queued': ( 'scheduler.html#fairscheduler.queued',
+                                                                                     'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.release': ( 'scheduler.html#fairscheduler.release',
+                                                                                      'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.slot': ( 'scheduler.html#fairscheduler.slot',
+                                                                                   'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.FairScheduler.submit': ( 'scheduler.html#fairscheduler.submit',
+                                                                                     'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.RateLimitExceeded': ( 'scheduler.html#ratelimitexceeded',
+                                                                                  'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.RateLimitExceeded.__init__': ( 'scheduler.html#ratelimitexceeded.__init__',
+                                                                                           'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.Ticket': ('scheduler.html#ticket', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.Ticket.__init__': ('scheduler.html#ticket.__init__', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.Ticket.__lt__': ('scheduler.html#ticket.__lt__', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.Ticket._grant': ('scheduler.html#ticket._grant', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.Ticket.async_wait': ( 'scheduler.html#ticket.async_wait',
+                                                                                  'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.Ticket.wait': ('scheduler.html#ticket.wait', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.TokenBucket': ('scheduler.html#tokenbucket', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.TokenBucket.__init__': ( 'scheduler.html#tokenbucket.__init__',
+                                                                                     'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.TokenBucket._refill': ( 'scheduler.html#tokenbucket._refill',
+                                                                                    'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.TokenBucket.put': ('scheduler.html#tokenbucket.put', 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.TokenBucket.take': ( 'scheduler.html#tokenbucket.take',
+                                                                                 'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler.TokenBucket.wait_time': ( 'scheduler.html#tokenbucket.wait_time',
+                                                                                      'gradiochat/scheduler.py'),
+                                      'gradiochat.scheduler._grant': ('scheduler.html#_grant', 'gradiochat/scheduler.py')},
+            'gradiochat.tokens': { 'gradiochat.tokens.TokenCounter': ('tokens.html#tokencounter', 'gradiochat/tokens.py'),
+                                   'gradiochat.tokens.TokenCounter.__init__': ('tokens.html#tokencounter.__init__', 'gradiochat/tokens.py'),
+                                   'gradiochat.tokens.TokenCounter._count_uncached': ( 'tokens.html#tokencounter._count_uncached',
+                                                                                       'gradiochat/tokens.py'),
+                                   'gradiochat.tokens.TokenCounter.count': ('tokens.html#tokencounter.count', 'gradiochat/tokens.py'),
+                                   'gradiochat.tokens.TokenCounter.count_message': ( 'tokens.html#tokencounter.count_message',
+                                                                                     'gradiochat/tokens.py'),
+                                   'gradiochat.tokens.fit_history': ('tokens.html#fit_history', 'gradiochat/tokens.py')},
             'gradiochat.ui': { 'gradiochat.ui.GradioChat': ('ui.html#gradiochat', 'gradiochat/ui.py'),
                                'gradiochat.ui.GradioChat.__init__': ('ui.html#gradiochat.__init__', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._aslot': ('ui.html#gradiochat._aslot', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._await_turn': ('ui.html#gradiochat._await_turn', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._begin_generation': ('ui.html#gradiochat._begin_generation', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._end_generation': ('ui.html#gradiochat._end_generation', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._friendly_error': ('ui.html#gradiochat._friendly_error', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._log_turn': ('ui.html#gradiochat._log_turn', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._release': ('ui.html#gradiochat._release', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._schedule': ('ui.html#gradiochat._schedule', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._slot': ('ui.html#gradiochat._slot', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._stop_generations': ('ui.html#gradiochat._stop_generations', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._store_partial': ('ui.html#gradiochat._store_partial', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat._wait_turn': ('ui.html#gradiochat._wait_turn', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.arespond': ('ui.html#gradiochat.arespond', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.arespond_stream': ('ui.html#gradiochat.arespond_stream', 'gradiochat/ui.py'),
                                'gradiochat.ui.GradioChat.build_interface': ('ui.html#gradiochat.build_interface', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.clear_session': ('ui.html#gradiochat.clear_session', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.export_history': ('ui.html#gradiochat.export_history', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.forget_conversation': ( 'ui.html#gradiochat.forget_conversation',
+                                                                                 'gradiochat/ui.py'),
                                'gradiochat.ui.GradioChat.launch': ('ui.html#gradiochat.launch', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.new_conversation': ('ui.html#gradiochat.new_conversation', 'gradiochat/ui.py'),
                                'gradiochat.ui.GradioChat.respond': ('ui.html#gradiochat.respond', 'gradiochat/ui.py'),
                                'gradiochat.ui.GradioChat.respond_stream': ('ui.html#gradiochat.respond_stream', 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.resume_conversation': ( 'ui.html#gradiochat.resume_conversation',
+                                                                                 'gradiochat/ui.py'),
+                               'gradiochat.ui.GradioChat.stop_generation': ('ui.html#gradiochat.stop_generation', 'gradiochat/ui.py'),
+                               'gradiochat.ui.StreamFrames': ('ui.html#streamframes', 'gradiochat/ui.py'),
+                               'gradiochat.ui.StreamFrames.__init__': ('ui.html#streamframes.__init__', 'gradiochat/ui.py'),
+                               'gradiochat.ui.StreamFrames.add': ('ui.html#streamframes.add', 'gradiochat/ui.py'),
+                               'gradiochat.ui.StreamFrames.flush': ('ui.html#streamframes.flush', 'gradiochat/ui.py'),
+                               'gradiochat.ui.StreamFrames.received': ('ui.html#streamframes.received', 'gradiochat/ui.py'),
+                               'gradiochat.ui._Generation': ('ui.html#_generation', 'gradiochat/ui.py'),
+                               'gradiochat.ui._Generation.__init__': ('ui.html#_generation.__init__', 'gradiochat/ui.py'),
+                               'gradiochat.ui._Generation.stop': ('ui.html#_generation.stop', 'gradiochat/ui.py'),
                                'gradiochat.ui.create_chat_app': ('ui.html#create_chat_app', 'gradiochat/ui.py')},
             'gradiochat.utils': { 'gradiochat.utils._escape_table_cell': ( 'gradiochat_utils.html#_escape_table_cell',
                                                                            'gradiochat/utils.py'),
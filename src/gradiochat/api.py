@@ -0,0 +1,157 @@
+"""An OpenAI compatible chat completions endpoint for a chat app, for other services that don't need the Gradio frontend."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/15_api.ipynb.
+
+# %% auto 0
+__all__ = ['create_api', 'create_api_from_env']
+
+# %% ../../nbs/15_api.ipynb 3
+from typing import AsyncIterator, List, Dict, Optional, Union
+from pathlib import Path
+import asyncio
+import json
+import math
+import os
+import time
+import uuid
+import weakref
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .config import ChatAppConfig, Message
+from .app import BaseChatApp
+from .batch import parse_conversation
+from .policy import ProviderBusyError, is_retryable
+from .scheduler import Ticket, RateLimitExceeded
+
+# %% ../../nbs/15_api.ipynb 6
+_PARAMS = ("temperature", "top_p", "stop", "frequency_penalty", "max_completion_tokens")
+
+def _error(message: str, status_code: int, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    """An error response in the OpenAI format"""
+    return JSONResponse({"error": {"message": message, "type": error_type}}, status_code=status_code, headers=headers)
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def create_api(app: Union[ChatAppConfig, BaseChatApp]) -> FastAPI:
+    """FastAPI app with an OpenAI compatible chat completions endpoint for a chat app"""
+    chat_app = app if isinstance(app, BaseChatApp) else BaseChatApp(app)
+    api = FastAPI(title=chat_app.config.app_name, description=chat_app.config.description)
+    api.state.chat_app = chat_app
+    model_name = chat_app.config.model.model_name
+
+    def failure(error: Exception) -> JSONResponse:
+        if isinstance(error, RateLimitExceeded):
+            seconds = math.ceil(error.retry_after)
+            return _error(chat_app.config.scheduler.rate_limit_message.format(seconds=seconds), 429, "rate_limit_error", {"Retry-After": str(seconds)})
+        if isinstance(error, ProviderBusyError) or is_retryable(error):
+            return _error(chat_app.config.busy_message, 503, "server_error")
+        return _error(str(error), 500, "server_error")
+
+    async def turn(request: Request, user: Optional[str], user_message: str, history: List[Dict[str, str]], **kwargs) -> Optional[Ticket]:
+        """Wait for the turn of a request in the app's fair queue, None when the app has no scheduler"""
+        scheduler = chat_app.scheduler
+        if scheduler is None:
+            return None
+        prompt_tokens, completion_tokens = chat_app.estimate_tokens(user_message, history, **kwargs)
+        ip = request.client.host if request.client is not None else None
+        ticket = scheduler.submit(user, ip, prompt_tokens + completion_tokens, loop=asyncio.get_running_loop())
+        ticket.used = prompt_tokens
+        try:
+            granted = await ticket.async_wait(scheduler.config.queue_timeout)
+        except BaseException:
+            scheduler.release(ticket)
+            raise
+        # A slot handed on just after the wait timed out is used, not thrown away
+        if not granted:
+            error = scheduler.expire(ticket)
+            if error is not None:
+                raise error
+        return ticket
+
+    def release(ticket: Optional[Ticket], completion_tokens: int) -> None:
+        if ticket is not None and not ticket.released:
+            ticket.used += completion_tokens
+            chat_app.scheduler.release(ticket)
+
+    @api.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": model_name, "object": "model", "created": 0, "owned_by": "gradiochat"}]}
+
+    @api.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        try:
+            body = await request.json()
+            messages = [Message(**m).model_dump() for m in body["messages"]]
+            _, user_message, history = parse_conversation({"messages": messages}, 0)
+        except (ValueError, TypeError, KeyError) as e:
+            return _error(f"Invalid request: {e}", 400, "invalid_request_error")
+        kwargs = {k: body[k] for k in _PARAMS if body.get(k) is not None}
+        if body.get("max_tokens") is not None:
+            kwargs.setdefault("max_completion_tokens", body["max_tokens"])
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": model_name}
+
+        try:
+            ticket = await turn(request, body.get("user"), user_message, history, **kwargs)
+        except Exception as e:
+            return failure(e)
+
+        if not body.get("stream"):
+            completion_tokens = 0
+            try:
+                text = await chat_app.agenerate_response(user_message, history, **kwargs)
+                completion_tokens = chat_app.token_counter.count(text)
+            except Exception as e:
+                return failure(e)
+            finally:
+                release(ticket, completion_tokens)
+            return {**base, "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]}
+
+        stream = chat_app.agenerate_stream(user_message, history, **kwargs)
+        try:
+            # Wait for the first chunk, so a failing provider is still reported with an error status
+            first = await anext(stream, None)
+        except BaseException as e:
+            release(ticket, 0)
+            if not isinstance(e, Exception):
+                raise
+            return failure(e)
+
+        async def events() -> AsyncIterator[str]:
+            chunk = {**base, "object": "chat.completion.chunk"}
+            received = [first or ""]
+            try:
+                yield f"data: {_dumps({**chunk, 'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': first or ''}, 'finish_reason': None}]})}\n\n"
+                async for text in stream:
+                    received.append(text)
+                    yield f"data: {_dumps({**chunk, 'choices': [{'index': 0, 'delta': {'content': text}, 'finish_reason': None}]})}\n\n"
+            except Exception as e:
+                # The status has been sent already, so the error is the last event of the stream
+                yield f"data: {_dumps(json.loads(failure(e).body))}\n\n"
+                return
+            finally:
+                # Starlette cancels the response when the client disconnects, closing the stream ends the generation
+                await stream.aclose()
+                release(ticket, chat_app.token_counter.count("".join(received)))
+            yield f"data: {_dumps({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        body_iterator = events()
+        # A response that is never sent doesn't run the generator, so its slot is released when it is dropped
+        weakref.finalize(body_iterator, release, ticket, 0)
+        return StreamingResponse(body_iterator, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    return api
+
+# %% ../../nbs/15_api.ipynb 8
+def create_api_from_env(
+        env_var: str = "GRADIOCHAT_CONFIG" # Environment variable with the path of a ChatAppConfig JSON file
+        ) -> FastAPI:
+    """The API of the chat app configured in the JSON file named by an environment variable"""
+    path = os.environ.get(env_var)
+    if not path:
+        raise RuntimeError(f"Set {env_var} to the path of a ChatAppConfig JSON file")
+    return create_api(ChatAppConfig.model_validate_json(Path(path).read_text(encoding='utf-8')))
@@ -3,15 +3,32 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/01_app.ipynb.
 
 # %% auto 0
-__all__ = ['LLMClientProtocol', 'HuggingFaceClient', 'TogetherAiClient', 'OllamaClient', 'create_llm_client', 'BaseChatApp']
+__all__ = ['client_registry', 'LLMClientProtocol', 'AsyncLLMClientProtocol', 'ClientRegistry', 'PromptCacheStats',
+           'HuggingFaceClient', 'TogetherAiClient', 'OllamaClient', 'create_llm_client', 'BaseChatApp']
 
 # %% ../../nbs/01_app.ipynb 3
-from typing import Protocol, runtime_checkable, Generator, List
-from openai import OpenAI
-from ollama import Client as OllamaSDK
-from ollama import AsyncClient as AsyncOllamaSDK
+from typing import Protocol, runtime_checkable, Generator, AsyncIterator, List, Dict, Optional, Tuple, Any, Callable
+import asyncio
+import hashlib
+import importlib.util
+import json
+import threading
+import warnings
+import weakref
+from functools import partial
+import httpx
 
-from .config import ModelConfig, Message, ChatAppConfig
+from .config import ModelConfig, Message, ChatMessage, ChatAppConfig, message_dicts, ROLES
+from .cache import CachedClient, SemanticCache, completion_cache_key, get_cache
+from .tokens import TokenCounter, fit_history
+from .retrieval import build_index
+from .context import ContextFiles
+from .conversation_log import get_conversation_log
+from .scheduler import FairScheduler
+from .routing import RoutingClient
+from .policy import PolicyClient
+from .hedging import HedgedClient
+from .metrics import RequestMetrics, instrument_stream, ainstrument_stream
 
 # %% ../../nbs/01_app.ipynb 7
 @runtime_checkable
@@ -26,7 +43,137 @@ class LLMClientProtocol(Protocol):
         """Generate a streaming response from the LLM"""
         ...
 
-# %% ../../nbs/01_app.ipynb 10
+# %% ../../nbs/01_app.ipynb 9
+@runtime_checkable
+class AsyncLLMClientProtocol(Protocol):
+    """Protocol defining the asyncio interface for LLM clients"""
+    
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a response from the LLM"""
+        ...
+    
+    def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Generate a streaming response from the LLM"""
+        ...
+
+# %% ../../nbs/01_app.ipynb 11
+class _LoopClient:
+    """Stands in for an async SDK client, with one real client per event loop, because an async connection pool can't outlive its loop"""
+
+    def __init__(self, create: Callable[[], Any]):
+        """Create the real clients with `create` on first use in a loop"""
+        self._create = create
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def for_loop(self) -> Any:
+        """The client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # The pools of closed loops can't be used anymore, and may keep their loop alive
+            for closed in [l for l in self._clients.keys() if l.is_closed()]:
+                del self._clients[closed]
+            if loop not in self._clients:
+                self._clients[loop] = self._create()
+            return self._clients[loop]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.for_loop(), name)
+
+class ClientRegistry:
+    """Process wide registry of SDK clients, so apps using the same provider share one keep-alive connection pool"""
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._clients: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def http_options(model_config: ModelConfig) -> dict:
+        """Keyword arguments for an `httpx` client following the pool and timeout settings of the model config"""
+        return dict(
+            timeout=httpx.Timeout(model_config.read_timeout, connect=model_config.connect_timeout),
+            limits=httpx.Limits(max_connections=model_config.max_connections,
+                                max_keepalive_connections=model_config.max_keepalive_connections),
+            http2=model_config.http2 and importlib.util.find_spec("h2") is not None,
+        )
+
+    def _create(self, sdk: str, base_url: str, api_key: Optional[str], model_config: ModelConfig) -> Any:
+        """Create a new SDK client on top of its own `httpx` pool"""
+        options = self.http_options(model_config)
+        # The SDKs are only imported for the providers that are used, they take a while to import
+        # Retries are left to the PolicyClient, so they work the same for every provider
+        if sdk == "openai":
+            from openai import OpenAI
+            return OpenAI(base_url=base_url, api_key=api_key, timeout=options["timeout"], max_retries=0, http_client=httpx.Client(**options))
+        if sdk == "async_openai":
+            from openai import AsyncOpenAI
+            return AsyncOpenAI(base_url=base_url, api_key=api_key, timeout=options["timeout"], max_retries=0, http_client=httpx.AsyncClient(**options))
+        if sdk == "ollama":
+            from ollama import Client as OllamaSDK
+            return OllamaSDK(host=base_url, **options)
+        if sdk == "async_ollama":
+            from ollama import AsyncClient as AsyncOllamaSDK
+            return AsyncOllamaSDK(host=base_url, **options)
+        raise ValueError(f"Unsupported SDK: {sdk}")
+
+    def get(self,
+            sdk: str, # One of "openai", "async_openai", "ollama" or "async_ollama"
+            base_url: str,
+            api_key: Optional[str],
+            model_config: ModelConfig
+            ) -> Any:
+        """Return the shared SDK client for these connection settings, creating it on first use. Async clients are created per event loop"""
+        key = (sdk, base_url, hashlib.sha256((api_key or "").encode()).hexdigest(),
+               model_config.connect_timeout, model_config.read_timeout,
+               model_config.max_connections, model_config.max_keepalive_connections, model_config.http2)
+        with self._lock:
+            if key not in self._clients:
+                create = partial(self._create, sdk, base_url, api_key, model_config)
+                self._clients[key] = _LoopClient(create) if sdk.startswith("async_") else create()
+            return self._clients[key]
+
+    def clear(self) -> None:
+        """Forget all clients, new requests will open new pools"""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+client_registry = ClientRegistry()
+
+# %% ../../nbs/01_app.ipynb 14
+class PromptCacheStats:
+    """Thread-safe counters of how many prompt tokens the provider served from its prefix cache"""
+
+    def __init__(self):
+        """Initialize all counters at zero"""
+        self.requests = 0
+        self.prompt_tokens = 0 # For Ollama these are the prompt tokens that had to be evaluated
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens: int, cached_tokens: int = 0) -> None:
+        """Record the prompt usage of one request"""
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    def record_openai_usage(self, usage: Any) -> None:
+        """Record the usage of an OpenAI compatible response, if the provider returned it"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.record(usage.prompt_tokens or 0, getattr(details, "cached_tokens", None) or 0)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the prompt tokens that came from the provider's cache"""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+# %% ../../nbs/01_app.ipynb 18
 class HuggingFaceClient():
     """Client for interacting with HuggingFace models"""
     
@@ -37,37 +184,84 @@ class HuggingFaceClient():
         # Default to HF Inference API if no base URL is provided
         base_url = model_config.api_base_url or "https://router.huggingface.co/hf-inference/v1"
 
-        self.client = OpenAI(
-            base_url=base_url,
-            api_key=model_config.api_key or "hf_no_api_key_provided"
-        )
+        api_key = model_config.api_key or "hf_no_api_key_provided"
+        self.client = client_registry.get("openai", base_url, api_key, model_config)
+        self.aclient = client_registry.get("async_openai", base_url, api_key, model_config)
+        self.prompt_cache_stats = PromptCacheStats()
     
-    def chat_completion(self, 
+    def _completion_params(self,
             messages: List[Message], # List of messages conforming to the Message pydantic dataclass
             **kwargs
-            ) -> str:
-        """Generate a chat completion from the HuggingFace model"""
-        # Convert our Message objects to the format expected by the OpenAI client
-        openai_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
+            ) -> dict:
+        """Build the request parameters for the OpenAI compatible HF router"""
+        # ChatMessages already are the dicts the OpenAI client expects, Message objects are converted
+        openai_messages = message_dicts(messages)
 
-        completion = self.client.chat.completions.create(
+        return dict(
             model=self.model_config.model_name,
             messages=openai_messages,
             max_completion_tokens=kwargs.get("max_completion_tokens", self.model_config.max_completion_tokens),
-            temperature=kwargs.get("temperature", self.model_config.temperature)
+            temperature=kwargs.get("temperature", self.model_config.temperature),
+            top_p=kwargs.get("top_p", self.model_config.top_p),
+            stop=kwargs.get("stop", self.model_config.stop),
+            frequency_penalty=kwargs.get("frequency_penalty", self.model_config.frequency_penalty)
         )
+    
+    def _stream_params(self) -> dict:
+        """Extra parameters for streaming requests, asking for usage statistics when prompt caching is on"""
+        if self.model_config.prompt_caching:
+            return dict(stream=True, stream_options={"include_usage": True})
+        return dict(stream=True)
+    
+    def health_check(self) -> None:
+        """Raise an exception if the provider can't be reached"""
+        self.client.models.list()
+    
+    def chat_completion(self, 
+            messages: List[Message], # List of messages conforming to the Message pydantic dataclass
+            **kwargs
+            ) -> str:
+        """Generate a chat completion from the HuggingFace model"""
+        completion = self.client.chat.completions.create(**self._completion_params(messages, **kwargs))
+        self.prompt_cache_stats.record_openai_usage(completion.usage)
 
         # Extract the generated text
         return completion.choices[0].message.content
     
-    def chat_completion_stream(self, messages: List[Message], **kwargs) -> Generator[str, None, None]:
+    def chat_completion_stream(self,
+            messages: List[Message], # List of messages conforming to the Message pydantic dataclass
+            **kwargs) -> Generator[str, None, None]:
         """Generate a streaming chat completion"""
-        # For now, use non-streaming version as a placeholder
-        # We'll implement proper streaming later
-        result = self.chat_completion(messages, **kwargs)
-        yield result
+        stream = self.client.chat.completions.create(**self._completion_params(messages, **kwargs), **self._stream_params())
+
+        # Some chunks, like a final usage chunk, carry no choices
+        try:
+            for token in stream:
+                self.prompt_cache_stats.record_openai_usage(token.usage)
+                if token.choices and token.choices[0].delta.content:
+                    yield token.choices[0].delta.content
+        finally:
+            # Closing the response stops the generation when the consumer stops reading early
+            stream.close()
+    
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a chat completion from the HuggingFace model without blocking the event loop"""
+        completion = await self.aclient.chat.completions.create(**self._completion_params(messages, **kwargs))
+        self.prompt_cache_stats.record_openai_usage(completion.usage)
+        return completion.choices[0].message.content
+    
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Generate a streaming chat completion without blocking the event loop"""
+        stream = await self.aclient.chat.completions.create(**self._completion_params(messages, **kwargs), **self._stream_params())
+        try:
+            async for token in stream:
+                self.prompt_cache_stats.record_openai_usage(token.usage)
+                if token.choices and token.choices[0].delta.content:
+                    yield token.choices[0].delta.content
+        finally:
+            await stream.close()
 
-# %% ../../nbs/01_app.ipynb 12
+# %% ../../nbs/01_app.ipynb 21
 class TogetherAiClient():
     """Client for interacting with models through the TogetherAI API server
     We use the openai package"""
@@ -76,20 +270,20 @@ class TogetherAiClient():
         """Initialize the client with model configuration"""
         self.model_config = model_config
 
-        self.client = OpenAI(
-            base_url=model_config.api_base_url or "https://api.together.xyz/v1", # Default to Together AI Inference API if no base URL is provided
-            api_key=model_config.api_key,
-        )
+        base_url = model_config.api_base_url or "https://api.together.xyz/v1" # Default to Together AI Inference API if no base URL is provided
+        self.client = client_registry.get("openai", base_url, model_config.api_key, model_config)
+        self.aclient = client_registry.get("async_openai", base_url, model_config.api_key, model_config)
+        self.prompt_cache_stats = PromptCacheStats()
     
-    def chat_completion(self, 
+    def _completion_params(self,
             messages: List[Message], # List of messages conforming to the Message pydantic dataclass
             **kwargs
-            ) -> str:
-        """Generate a chat completion from the Together AI API"""
-        # Convert our Message objects to the format expected by the OpenAI client
-        openai_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
+            ) -> dict:
+        """Build the request parameters for the Together AI API"""
+        # ChatMessages already are the dicts the OpenAI client expects, Message objects are converted
+        openai_messages = message_dicts(messages)
 
-        completion = self.client.chat.completions.create(
+        return dict(
             model=self.model_config.model_name,
             messages=openai_messages,
             max_completion_tokens=kwargs.get("max_completion_tokens", self.model_config.max_completion_tokens),
@@ -97,6 +291,24 @@ class TogetherAiClient():
             top_p=kwargs.get("top_p", self.model_config.top_p),
             stop=kwargs.get("stop", self.model_config.stop) or ["<|eot_id|>","<|eom_id|>"]
         )
+    
+    def _stream_params(self) -> dict:
+        """Extra parameters for streaming requests, asking for usage statistics when prompt caching is on"""
+        if self.model_config.prompt_caching:
+            return dict(stream=True, stream_options={"include_usage": True})
+        return dict(stream=True)
+    
+    def health_check(self) -> None:
+        """Raise an exception if the provider can't be reached"""
+        self.client.models.list()
+    
+    def chat_completion(self, 
+            messages: List[Message], # List of messages conforming to the Message pydantic dataclass
+            **kwargs
+            ) -> str:
+        """Generate a chat completion from the Together AI API"""
+        completion = self.client.chat.completions.create(**self._completion_params(messages, **kwargs))
+        self.prompt_cache_stats.record_openai_usage(completion.usage)
 
         # Extract the generated text
         return completion.choices[0].message.content
@@ -105,25 +317,35 @@ class TogetherAiClient():
             messages: List[Message], # List of messages conforming to the Message pydantic dataclass
             **kwargs) -> Generator[str, None, None]:
         """Generate a streaming chat completion"""
+        stream = self.client.chat.completions.create(**self._completion_params(messages, **kwargs), **self._stream_params())
 
-        openai_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
-
-        stream = self.client.chat.completions.create(
-            model=self.model_config.model_name,
-            messages=openai_messages,
-            max_completion_tokens=kwargs.get("max_completion_tokens", self.model_config.max_completion_tokens),
-            temperature=kwargs.get("temperature", self.model_config.temperature),
-            top_p=kwargs.get("top_p", self.model_config.top_p),
-            stop=kwargs.get("stop", self.model_config.stop) or ["<|eot_id|>","<|eom_id|>"],
-            stream=True
-        )
-
-        for token in stream:
-            if hasattr(token, 'choices') and token.choices[0].delta.content is not None:
-                yield token.choices[0].delta.content
-           
+        try:
+            for token in stream:
+                self.prompt_cache_stats.record_openai_usage(token.usage)
+                if token.choices and token.choices[0].delta.content:
+                    yield token.choices[0].delta.content
+        finally:
+            # Closing the response stops the generation when the consumer stops reading early
+            stream.close()
+    
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a chat completion from the Together AI API without blocking the event loop"""
+        completion = await self.aclient.chat.completions.create(**self._completion_params(messages, **kwargs))
+        self.prompt_cache_stats.record_openai_usage(completion.usage)
+        return completion.choices[0].message.content
+    
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Generate a streaming chat completion without blocking the event loop"""
+        stream = await self.aclient.chat.completions.create(**self._completion_params(messages, **kwargs), **self._stream_params())
+        try:
+            async for token in stream:
+                self.prompt_cache_stats.record_openai_usage(token.usage)
+                if token.choices and token.choices[0].delta.content:
+                    yield token.choices[0].delta.content
+        finally:
+            await stream.close()
 
-# %% ../../nbs/01_app.ipynb 14
+# %% ../../nbs/01_app.ipynb 23
 class OllamaClient():
     """Client for interacting with models through a local Ollama API server
     Uses the official Ollama Python library"""
@@ -135,21 +357,25 @@ class OllamaClient():
         # Extract host from api_base_url or use default
         host = model_config.api_base_url or "http://localhost:11434"
         
-        # Create Ollama client
-        self.client = OllamaSDK(host=host)
+        # Get the shared Ollama clients for this host
+        self.client = client_registry.get("ollama", host, None, model_config)
+        self.aclient = client_registry.get("async_ollama", host, None, model_config)
+        self.prompt_cache_stats = PromptCacheStats()
     
-    def chat_completion(self, 
+    def _chat_params(self,
             messages: List[Message], # List of messages conforming to the Message pydantic dataclass
+            stream: bool = False,
             **kwargs
-            ) -> str:
-        """Generate a chat completion from the Ollama API"""
-        # Convert our Message objects to the format expected by the Ollama client
-        ollama_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
+            ) -> dict:
+        """Build the request parameters for the Ollama API"""
+        # ChatMessages already are the dicts the Ollama client expects, Message objects are converted
+        ollama_messages = message_dicts(messages)
 
         # Prepare parameters
         params = {
             "model": self.model_config.model_name,
             "messages": ollama_messages,
+            "stream": stream,
             "options": {
                 "temperature": kwargs.get("temperature", self.model_config.temperature),
                 "top_p": kwargs.get("top_p", self.model_config.top_p),
@@ -166,8 +392,29 @@ class OllamaClient():
         if stop is not None:
             params["options"]["stop"] = stop
 
+        # Keep the model, and with it the evaluated prompt prefix, loaded between requests
+        if self.model_config.keep_alive is not None:
+            params["keep_alive"] = self.model_config.keep_alive
+
+        return params
+    
+    def _record_usage(self, response: Any) -> None:
+        """Record the evaluated prompt tokens of the final response, Ollama evaluates fewer when it reuses the prefix"""
+        if response.done and response.prompt_eval_count is not None:
+            self.prompt_cache_stats.record(response.prompt_eval_count)
+    
+    def health_check(self) -> None:
+        """Raise an exception if the provider can't be reached"""
+        self.client.list()
+    
+    def chat_completion(self, 
+            messages: List[Message], # List of messages conforming to the Message pydantic dataclass
+            **kwargs
+            ) -> str:
+        """Generate a chat completion from the Ollama API"""
         # Call the Ollama API
-        response = self.client.chat(**params)
+        response = self.client.chat(**self._chat_params(messages, **kwargs))
+        self._record_usage(response)
 
         # Extract the generated text
         return response.message.content
@@ -176,99 +423,349 @@ class OllamaClient():
             messages: List[Message], # List of messages conforming to the Message pydantic dataclass
             **kwargs) -> Generator[str, None, None]:
         """Generate a streaming chat completion"""
-        # Convert our Message objects to the format expected by the Ollama client
-        ollama_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
-
-        # Prepare parameters
-        params = {
-            "model": self.model_config.model_name,
-            "messages": ollama_messages,
-            "stream": True,
-            "options": {
-                "temperature": kwargs.get("temperature", self.model_config.temperature),
-                "top_p": kwargs.get("top_p", self.model_config.top_p),
-            }
-        }
-        
-        # Add max_tokens if specified
-        max_tokens = kwargs.get("max_completion_tokens", self.model_config.max_completion_tokens)
-        if max_tokens is not None:
-            params["options"]["num_predict"] = max_tokens
-            
-        # Add stop sequences if specified
-        stop = kwargs.get("stop", self.model_config.stop)
-        if stop is not None:
-            params["options"]["stop"] = stop
-
         # Call the Ollama API with streaming
-        stream = self.client.chat(**params)
+        stream = self.client.chat(**self._chat_params(messages, stream=True, **kwargs))
 
         # Yield each chunk of content
-        for chunk in stream:
-            if chunk.message and chunk.message.content:
-                yield chunk.message.content
-
-
+        try:
+            for chunk in stream:
+                self._record_usage(chunk)
+                if chunk.message and chunk.message.content:
+                    yield chunk.message.content
+        finally:
+            # Closing the generator closes the response, which stops the generation on the server
+            stream.close()
+    
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a chat completion from the Ollama API without blocking the event loop"""
+        response = await self.aclient.chat(**self._chat_params(messages, **kwargs))
+        self._record_usage(response)
+        return response.message.content
+    
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Generate a streaming chat completion without blocking the event loop"""
+        stream = await self.aclient.chat(**self._chat_params(messages, stream=True, **kwargs))
+        try:
+            async for chunk in stream:
+                self._record_usage(chunk)
+                if chunk.message and chunk.message.content:
+                    yield chunk.message.content
+        finally:
+            await stream.aclose()
 
-# %% ../../nbs/01_app.ipynb 16
+# %% ../../nbs/01_app.ipynb 27
 def create_llm_client(model_config: ModelConfig) -> LLMClientProtocol:
     """
     Factory function to create an LLM client based on the provider.
     """
     if model_config.provider.lower() == "huggingface":
-        return HuggingFaceClient(model_config)
-    if model_config.provider.lower() == "togetherai":
-        return TogetherAiClient(model_config)
-    if model_config.provider.lower() == "ollama":
-        return OllamaClient(model_config)
+        client = HuggingFaceClient(model_config)
+    elif model_config.provider.lower() == "togetherai":
+        client = TogetherAiClient(model_config)
+    elif model_config.provider.lower() == "ollama":
+        client = OllamaClient(model_config)
     else:
         raise ValueError(f"Unsupported provider: {model_config.provider}")
+    return PolicyClient(client, model_config)
 
-# %% ../../nbs/01_app.ipynb 18
+# %% ../../nbs/01_app.ipynb 29
 class BaseChatApp:
     """Base class for creating configurable chat applications with Gradio"""
     
     def __init__(self, config: ChatAppConfig):
         """Initialize the chat application"""
         self.config = config
-        self.chat_history = []
-        self._load_context()
-        self.client = create_llm_client(config.model)
+        self.conversation_log = get_conversation_log(config.conversation_log) if config.conversation_log is not None else None
+        self.scheduler = FairScheduler(config.scheduler) if config.scheduler is not None else None
+        self.token_counter = TokenCounter()
+        self.context = ContextFiles(config.context_files, reload_interval=config.context_reload_interval)
+        self.index = None
+        self._context_state = None # (context version, text, digest, index), replaced as a whole by refresh_context
+        self._refresh_lock = threading.Lock()
+        if config.routing is None:
+            self.client = create_llm_client(config.model)
+        else:
+            self.client = RoutingClient([create_llm_client(m) for m in [config.model, *config.routing.models]], config.routing)
+        if config.model.hedge_percentile is not None:
+            self.client = HedgedClient(self.client, config.model)
+        self.hedge_stats = getattr(self.client, "hedge_stats", None)
+        self.prompt_cache_stats = getattr(self.client, "prompt_cache_stats", None)
+        self._system_content = (None, None) # (context version, system content) of the last full-context system message
+        if config.cache is not None:
+            self.client = CachedClient(self.client, get_cache(config.cache), config.model, config.cache)
+        semantic = config.cache.semantic if config.cache is not None else None
+        self.semantic_cache = SemanticCache(semantic.threshold, semantic.max_entries, semantic.ttl, semantic.dimension, semantic.embed) if semantic is not None else None
+        self._semantic_namespace = None # Namespace of the system prompt and context files the semantic cache was last used with
+    
+    def log_turn(self,
+            session_id: str, # Conversation the turn belongs to
+            user_message: str,
+            response: str
+            ) -> None:
+        """Append a completed turn to the conversation log, if the app has one"""
+        if self.conversation_log is not None:
+            self.conversation_log.append(session_id, user_message, response, app=self.config.app_name, model=self.config.model.model_name)
         
-    def _load_context(self) -> None:
-        """Load context from markdown files"""
-        self.context_text = ""
-        for file_path in self.config.context_files:
-            if file_path.exists() and file_path.is_file():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.context_text += f.read() + "\n\n"
-    
-    def prepare_messages(self, user_message: str) -> List[Message]:
-        """Prepare the messages for the LLM, including system prompt and chat history"""
+    def refresh_context(self) -> None:
+        """Reload the context files that changed, when due, rebuild the retrieval index and swap in the new state"""
+        with self._refresh_lock:
+            self.context.refresh()
+            version, text, digest = self.context.current()
+            if self._context_state is not None and self._context_state[0] == version:
+                return
+            index = self.index
+            if self.config.retrieval is not None:
+                index = build_index(self.config.context_files, self.config.retrieval.chunk_size, self.config.retrieval.index_path)
+            self.index = index
+            self._context_state = (version, text, digest, index)
+    
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh_context()
+        except Exception as e:
+            warnings.warn(f"Reloading the context files failed: {e!r}")
+    
+    def _refresh_soon(self) -> None:
+        """Start a reload of the context in a background thread when one is due and none is running"""
+        if self.context.due and not self._refresh_lock.locked():
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+    
+    async def arefresh_context(self) -> None:
+        """Refresh the context without blocking the event loop: the first load is awaited, later reloads run in the background"""
+        if self._context_state is None:
+            await asyncio.to_thread(self.refresh_context)
+        else:
+            self._refresh_soon()
+    
+    def _state(self) -> Tuple[int, str, str, Any]:
+        """The current context state, loaded on first use"""
+        if self._context_state is None:
+            self.refresh_context()
+        return self._context_state
+    
+    @property
+    def context_text(self) -> str:
+        """The text of all context files as of the last reload"""
+        return self._state()[1]
+    
+    def context_for(self, user_message: str) -> str:
+        """The context to send with a user message: all context text, or only the relevant chunks in retrieval mode"""
+        if self.config.retrieval is None:
+            return self.context_text
+        chunks = self._state()[3].search(user_message, top_k=self.config.retrieval.top_k)
+        return "\n\n".join(chunk["text"] for chunk in chunks)
+    
+    def system_content(self, user_message: str) -> str:
+        """The system message: the system prompt with the full context, or with the chunks retrieved for this user message"""
+        if self.config.retrieval is not None:
+            if self.config.model.prompt_caching:
+                return self.config.system_prompt
+            context = self.context_for(user_message)
+            return self.config.system_prompt + (f"\n\nAdditional information: {context}" if context else "")
+        # Build the full-context system message once per version of the context files, so every request sends the same prefix
+        state_version, context = self._state()[:2]
+        version, content = self._system_content
+        if version != state_version or content is None:
+            content = self.config.system_prompt + (f"\n\nAdditional information: {context}" if context else "")
+            self._system_content = (state_version, content)
+        return content
+    
+    def prepare_messages(self,
+            user_message: str,
+            chat_history: Optional[List[Dict[str, str]]] = None # Previous messages of this session, in the Gradio messages format
+            ) -> List[ChatMessage]:
+        """Prepare the messages for the LLM, including system prompt and chat history, after reloading the context files when due"""
+        self.refresh_context()
+        return self._messages(user_message, chat_history)
+    
+    def _messages(self, user_message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> List[ChatMessage]:
+        """Prepare the messages for the LLM with the context as it is loaded now"""
         messages = []
         
         # Add system message with prompt and context
-        system_content = self.config.system_prompt
-        if self.context_text:
-            system_content += f"\n\nAdditional information: {self.context_text}"
+        system_content = self.system_content(user_message)
+        messages.append(ChatMessage("system", system_content))
         
-        messages.append(Message(role="system", content=system_content))
+        # The current user message, with the retrieved chunks when they are kept out of the cacheable system message
+        user_content = user_message
+        if self.config.retrieval is not None and self.config.model.prompt_caching:
+            context = self.context_for(user_message)
+            if context:
+                user_content = f"Additional information: {context}\n\n{user_message}"
+        
+        # Drop the oldest turns if the conversation doesn't fit in the context window
+        chat_history = chat_history or []
+        if self.config.model.max_context_tokens is not None:
+            budget = self.config.model.max_context_tokens - self.config.model.max_completion_tokens
+            chat_history = fit_history(self.token_counter, system_content, chat_history, user_content, budget)
         
         # Add chat history
-        for msg in self.chat_history:
-            messages.append(Message(role=msg['role'], content=msg['content']))
+        for msg in chat_history:
+            role, content = msg['role'], msg['content']
+            if role not in ROLES or not isinstance(content, str):
+                raise ValueError(f"Invalid message in chat history: {msg!r}")
+            messages.append(ChatMessage(role, content))
         
-        # Add current user message
-        messages.append(Message(role="user", content=user_message))
+        messages.append(ChatMessage("user", user_content))
         
         return messages
     
-    def generate_response(self, user_message: str, **kwargs) -> str:
+    def estimate_tokens(self,
+            user_message: str,
+            chat_history: Optional[List[Dict[str, str]]] = None, # Previous messages of this session, in the Gradio messages format
+            **kwargs
+            ) -> Tuple[int, int]:
+        """Estimated prompt tokens and maximum completion tokens of a request, for the scheduler"""
+        if self._context_state is None:
+            # Don't read the context files on the caller's thread, which may be the event loop; count without them
+            contents = [self.config.system_prompt, *(m["content"] for m in chat_history or []), user_message]
+        else:
+            contents = [m.content for m in self._messages(user_message, chat_history)]
+        prompt_tokens = sum(self.token_counter.count_message(c) for c in contents)
+        return prompt_tokens, kwargs.get("max_completion_tokens", self.config.model.max_completion_tokens)
+    
+    def semantic_query(self,
+            user_message: str,
+            chat_history: Optional[List[Dict[str, str]]] = None, # Previous messages of this session, in the Gradio messages format
+            **kwargs
+            ) -> Optional[Tuple[str, str, Any]]:
+        """Namespace, scope and vector of a request in the semantic cache, or None if the request doesn't use it"""
+        if self.semantic_cache is None:
+            return None
+        cache_config = self.config.cache
+        chat_history = chat_history or []
+        if len(chat_history) > cache_config.semantic.max_history_messages:
+            return None
+        if cache_config.deterministic_only and kwargs.get("temperature", self.config.model.temperature) != 0:
+            return None
+        namespace = hashlib.sha256(json.dumps([self.config.system_prompt, self._state()[2]]).encode()).hexdigest()
+        if namespace != self._semantic_namespace:
+            # The system prompt or the context files changed, so the cached answers may be outdated
+            if self._semantic_namespace is not None:
+                self.semantic_cache.invalidate(self._semantic_namespace)
+            self._semantic_namespace = namespace
+        history = [{"role": m["role"], "content": m["content"]} for m in chat_history]
+        return namespace, completion_cache_key(history, self.config.model, **kwargs), self.semantic_cache.vector(user_message)
+    
+    def _semantic_get(self, query: Optional[Tuple[str, str, Any]]) -> Optional[str]:
+        """The answer the semantic cache has for a request, or None"""
+        return self.semantic_cache.get(*query) if query is not None else None
+    
+    def _semantic_replay(self, answer: str) -> Generator[str, None, None]:
+        """Split an answer from the semantic cache in chunks"""
+        size = self.config.cache.replay_chunk_size
+        for i in range(0, len(answer), size):
+            yield answer[i:i + size]
+    
+    async def _asemantic_replay(self, answer: str) -> AsyncIterator[str]:
+        """Split an answer from the semantic cache in chunks, as an async stream"""
+        for chunk in self._semantic_replay(answer):
+            yield chunk
+    
+    def _semantic_store(self, query: Tuple[str, str, Any], stream: Generator[str, None, None]) -> Generator[str, None, None]:
+        """Pass a stream on and store the answer in the semantic cache once the stream has completed"""
+        parts = []
+        try:
+            for chunk in stream:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()
+        self.semantic_cache.set(*query, "".join(parts))
+    
+    async def _asemantic_store(self, query: Tuple[str, str, Any], stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pass an async stream on and store the answer in the semantic cache once the stream has completed"""
+        parts = []
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        self.semantic_cache.set(*query, "".join(parts))
+    
+    def _prepare(self, user_message: str, chat_history: Optional[List[Dict[str, str]]], stream: bool, refresh: bool = True, **kwargs) -> Tuple[List[Message], RequestMetrics, Optional[Tuple[str, str, Any]]]:
+        """Start the metrics of a request, prepare its messages and its query in the semantic cache"""
+        model = self.config.model
+        metrics = RequestMetrics(self.config.app_name, model.model_name, model.provider, stream,
+                                 max_tokens=kwargs.get("max_completion_tokens", model.max_completion_tokens))
+        try:
+            messages = self.prepare_messages(user_message, chat_history) if refresh else self._messages(user_message, chat_history)
+            query = self.semantic_query(user_message, chat_history, **kwargs)
+        except Exception as e:
+            metrics.finish(e)
+            raise
+        metrics.prepared(messages)
+        return messages, metrics, query
+    
+    def generate_response(self, user_message: str, chat_history: Optional[List[Dict[str, str]]] = None, **kwargs) -> str:
         """Generate a response to the user message"""
-        messages = self.prepare_messages(user_message)
-        return self.client.chat_completion(messages, **kwargs)
+        messages, metrics, query = self._prepare(user_message, chat_history, stream=False, **kwargs)
+        try:
+            response = self._semantic_get(query)
+            if response is None:
+                response = self.client.chat_completion(messages, **kwargs)
+                if query is not None:
+                    self.semantic_cache.set(*query, response)
+        except BaseException as e:
+            metrics.finish(e)
+            raise
+        metrics.chunk(response)
+        metrics.finish()
+        return response
     
-    def generate_stream(self, user_message: str, **kwargs) -> Generator[str, None, None]:
+    def generate_stream(self, user_message: str, chat_history: Optional[List[Dict[str, str]]] = None, **kwargs) -> Generator[str, None, None]:
         """Generate a streaming response to the user message"""
-        messages = self.prepare_messages(user_message)
-        return self.client.chat_completion_stream(messages, **kwargs)
+        messages, metrics, query = self._prepare(user_message, chat_history, stream=True, **kwargs)
+        cached = self._semantic_get(query)
+        if cached is not None:
+            stream = self._semantic_replay(cached)
+        elif query is not None:
+            stream = self._semantic_store(query, self.client.chat_completion_stream(messages, **kwargs))
+        else:
+            stream = self.client.chat_completion_stream(messages, **kwargs)
+        return instrument_stream(metrics, stream)
+    
+    async def agenerate_response(self, user_message: str, chat_history: Optional[List[Dict[str, str]]] = None, **kwargs) -> str:
+        """Generate a response to the user message without blocking the event loop"""
+        await self.arefresh_context()
+        messages, metrics, query = self._prepare(user_message, chat_history, stream=False, refresh=False, **kwargs)
+        try:
+            response = self._semantic_get(query)
+            if response is None:
+                response = await self.client.achat_completion(messages, **kwargs)
+                if query is not None:
+                    self.semantic_cache.set(*query, response)
+        except BaseException as e:
+            metrics.finish(e)
+            raise
+        metrics.chunk(response)
+        metrics.finish()
+        return response
+    
+    def agenerate_stream(self, user_message: str, chat_history: Optional[List[Dict[str, str]]] = None, **kwargs) -> AsyncIterator[str]:
+        """Generate a streaming response to the user message without blocking the event loop"""
+        if self._context_state is None:
+            return self._aload_and_stream(user_message, chat_history, **kwargs)
+        self._refresh_soon()
+        messages, metrics, query = self._prepare(user_message, chat_history, stream=True, refresh=False, **kwargs)
+        cached = self._semantic_get(query)
+        if cached is not None:
+            stream = self._asemantic_replay(cached)
+        elif query is not None:
+            stream = self._asemantic_store(query, self.client.achat_completion_stream(messages, **kwargs))
+        else:
+            stream = self.client.achat_completion_stream(messages, **kwargs)
+        return ainstrument_stream(metrics, stream)
+    
+    async def _aload_and_stream(self, user_message: str, chat_history: Optional[List[Dict[str, str]]], **kwargs) -> AsyncIterator[str]:
+        """Load the context in a thread on the first request, then stream the response"""
+        await self.arefresh_context()
+        stream = self.agenerate_stream(user_message, chat_history, **kwargs)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
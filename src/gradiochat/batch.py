@@ -0,0 +1,211 @@
+"""Run a configured chat app over many conversations, such as a set of test questions."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/12_batch.ipynb.
+
+# %% auto 0
+__all__ = ['read_conversations', 'parse_conversation', 'completed_ids', 'BatchProgress', 'print_progress', 'arun_batch',
+           'run_batch']
+
+# %% ../../nbs/12_batch.ipynb 3
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Union, Callable, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+import asyncio
+import json
+import sys
+import time
+
+from .app import BaseChatApp
+
+# %% ../../nbs/12_batch.ipynb 6
+def read_conversations(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """The records of a JSONL file, read lazily"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def parse_conversation(record: Dict[str, Any], index: int) -> Tuple[str, str, List[Dict[str, str]]]:
+    """The id, user message and history of a batch record"""
+    conversation_id = str(record.get("id", index))
+    if "messages" in record:
+        messages = [m for m in record["messages"] if m["role"] != "system"]
+        if not messages or messages[-1]["role"] != "user":
+            raise ValueError(f"The messages of conversation {conversation_id} don't end with a user message")
+        return conversation_id, messages[-1]["content"], messages[:-1]
+    if "message" not in record:
+        raise ValueError(f"Conversation {conversation_id} has neither a `message` nor `messages`")
+    return conversation_id, record["message"], record.get("history", [])
+
+def completed_ids(path: Union[str, Path]) -> set:
+    """Ids of the conversations that already have a response in an output file"""
+    path = Path(path)
+    if not path.exists():
+        return set()
+    done = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError: # A line cut off by an interruption
+                continue
+            if record.get("response") is not None:
+                done.add(record["id"])
+    return done
+
+# %% ../../nbs/12_batch.ipynb 9
+class BatchProgress:
+    """Progress of a batch run"""
+
+    def __init__(self, total: Optional[int] = None):
+        """Start counting"""
+        self.total = total # Number of conversations in the input, if known
+        self.done = 0
+        self.errors = 0
+        self.skipped = 0 # Conversations that already had a response in the output
+        self.output_tokens = 0
+        self.start = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the start of the batch"""
+        return time.monotonic() - self.start
+
+    @property
+    def rate(self) -> float:
+        """Conversations per second"""
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Output tokens per second"""
+        return self.output_tokens / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        total = f"/{self.total}" if self.total is not None else ""
+        return (f"{self.done + self.skipped}{total} conversations, {self.errors} errors, {self.skipped} skipped, "
+                f"{self.rate:.1f} conversations/s, {self.tokens_per_second:.0f} tokens/s")
+
+def print_progress(progress: BatchProgress, final: bool = False) -> None:
+    """Show the progress on one line of stderr"""
+    print(f"\r{progress}", end="\n" if final else "", file=sys.stderr, flush=True)
+
+# %% ../../nbs/12_batch.ipynb 11
+async def arun_batch(
+        app: BaseChatApp,
+        conversations: Union[str, Path, Iterable[Dict[str, Any]]], # JSONL file or iterable of records
+        output: Union[str, Path], # JSONL file the results are written to
+        concurrency: int = 8, # Maximum number of requests in flight
+        ordered: bool = True, # Write the results in input order instead of as they complete
+        resume: bool = True, # Skip conversations that already have a response in `output`, otherwise start a new file
+        threads: bool = False, # Call the synchronous methods of the app in a thread pool
+        total: Optional[int] = None, # Number of conversations, for the progress. Counted for a JSONL file when None
+        progress: Optional[Callable[..., None]] = print_progress, # Called with the BatchProgress about every second, None to disable
+        **kwargs # Extra arguments for the LLM client, like temperature
+        ) -> BatchProgress:
+    """Run many conversations through a chat app and write the responses to a JSONL file"""
+    if isinstance(conversations, (str, Path)):
+        if total is None:
+            with open(conversations, encoding='utf-8') as f:
+                total = sum(1 for line in f if line.strip())
+        conversations = read_conversations(conversations)
+    output = Path(output)
+    done_ids = completed_ids(output) if resume else set()
+    stats = BatchProgress(total)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency) if threads else None
+    slots = asyncio.Semaphore(concurrency)
+    window = asyncio.Semaphore(4 * concurrency if ordered else concurrency)
+    results: Dict[int, Dict[str, Any]] = {}
+    next_write = 0
+
+    async def generate(message: str, history: List[Dict[str, str]]) -> str:
+        if executor is not None:
+            return await loop.run_in_executor(executor, partial(app.generate_response, message, history, **kwargs))
+        return await app.agenerate_response(message, history, **kwargs)
+
+    def write(f, record: Dict[str, Any]) -> None:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        window.release()
+
+    def parse(record: Any, index: int) -> Tuple[str, Any, List[Dict[str, str]], Optional[str]]:
+        try:
+            return (*parse_conversation(record, index), None)
+        except Exception as e:
+            # A broken record fails like a provider error instead of stopping the batch
+            conversation_id = str(record.get("id", index)) if isinstance(record, dict) else str(index)
+            message = record.get("message") if isinstance(record, dict) else None
+            return conversation_id, message, [], f"{type(e).__name__}: {e}"
+
+    async def run(f, position: int, conversation_id: str, message: str, history: List[Dict[str, str]], error: Optional[str] = None) -> None:
+        nonlocal next_write
+        record = {"id": conversation_id, "message": message}
+        start = time.monotonic()
+        if error is not None:
+            record.update(response=None, error=error, latency=0.0)
+            stats.errors += 1
+        else:
+            async with slots:
+                try:
+                    response = await generate(message, history)
+                    record.update(response=response, latency=time.monotonic() - start)
+                    stats.output_tokens += app.token_counter.count(response)
+                except Exception as e:
+                    record.update(response=None, error=f"{type(e).__name__}: {e}", latency=time.monotonic() - start)
+                    stats.errors += 1
+        stats.done += 1
+        if not ordered:
+            write(f, record)
+            return
+        results[position] = record
+        while next_write in results:
+            write(f, results.pop(next_write))
+            next_write += 1
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            progress(stats)
+
+    reporter = asyncio.ensure_future(report()) if progress is not None else None
+    try:
+        with open(output, "a" if resume else "w", encoding='utf-8') as f:
+            tasks, position = set(), 0
+            try:
+                for index, record in enumerate(conversations):
+                    conversation_id, message, history, error = parse(record, index)
+                    if conversation_id in done_ids:
+                        stats.skipped += 1
+                        continue
+                    await window.acquire()
+                    task = asyncio.ensure_future(run(f, position, conversation_id, message, history, error))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    position += 1
+                await asyncio.gather(*tasks)
+            except Exception:
+                # The input broke off: finish the conversations in flight before giving up
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                # Interrupted: stop the conversations in flight before the file is closed,
+                # and write the finished ones that still wait for an earlier one, so `resume` keeps them
+                for task in list(tasks):
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                for waiting in sorted(results):
+                    write(f, results.pop(waiting))
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+            progress(stats, final=True)
+        if executor is not None:
+            executor.shutdown(wait=False)
+    return stats
+
+
+def run_batch(app: BaseChatApp, conversations: Union[str, Path, Iterable[Dict[str, Any]]], output: Union[str, Path], **kwargs) -> BatchProgress:
+    """Run a batch from synchronous code, see `arun_batch` for the arguments"""
+    return asyncio.run(arun_batch(app, conversations, output, **kwargs))
@@ -0,0 +1,286 @@
+"""Measure throughput and latency of chat apps against a local stub of the OpenAI and Ollama APIs."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/08_bench.ipynb.
+
+# %% auto 0
+__all__ = ['StubConfig', 'create_stub_app', 'StubServer', 'measure', 'app_request', 'ui_request', 'run_benchmarks',
+           'format_results', 'bench_main']
+
+# %% ../../nbs/08_bench.ipynb 3
+from typing import List, Dict, Optional, Callable, AsyncIterator, Any
+from pathlib import Path
+import asyncio
+import json
+import random
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from pydantic import BaseModel, Field
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+from fastcore.script import call_parse
+
+from .config import ChatAppConfig, ModelConfig
+from .app import BaseChatApp
+from .ui import GradioChat
+from .metrics import percentile
+
+# %% ../../nbs/08_bench.ipynb 6
+class StubConfig(BaseModel):
+    """Behaviour of the stub LLM server"""
+    latency: float = Field(default=0.05, description="Seconds before the first token")
+    tokens_per_second: Optional[float] = Field(default=200, description="Rate at which tokens are streamed, None sends them as fast as possible")
+    output_tokens: int = Field(default=64, description="Number of tokens in every answer")
+    failure_rate: float = Field(default=0.0, description="Fraction of requests that get an error response [0-1]")
+    failure_status: int = Field(default=503, description="HTTP status code of the error responses")
+    disconnect_rate: float = Field(default=0.0, description="Fraction of streams that are cut off halfway [0-1]")
+    seed: Optional[int] = Field(default=None, description="Seed for the failure injection, for reproducible runs")
+
+# %% ../../nbs/08_bench.ipynb 7
+def create_stub_app(stub: StubConfig) -> FastAPI:
+    """FastAPI app that imitates the chat endpoints of the OpenAI and Ollama APIs"""
+    app = FastAPI()
+    rng = random.Random(stub.seed)
+
+    def prompt_tokens(body: dict) -> int:
+        return sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+
+    async def tokens():
+        """The tokens of an answer at the configured pace, or an error halfway when the stream is cut off"""
+        disconnect = rng.random() < stub.disconnect_rate
+        await asyncio.sleep(stub.latency)
+        for i in range(stub.output_tokens):
+            if disconnect and i == stub.output_tokens // 2:
+                raise ConnectionResetError("Stub server cut off the stream")
+            if i and stub.tokens_per_second:
+                await asyncio.sleep(1 / stub.tokens_per_second)
+            yield f"tok{i} "
+
+    def failure() -> Optional[JSONResponse]:
+        if rng.random() < stub.failure_rate:
+            return JSONResponse({"error": {"message": "Injected failure"}}, status_code=stub.failure_status)
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        body = await request.json()
+        if (response := failure()) is not None:
+            return response
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": body.get("model", "stub")}
+        usage = {"prompt_tokens": prompt_tokens(body), "completion_tokens": stub.output_tokens,
+                 "total_tokens": prompt_tokens(body) + stub.output_tokens}
+        if not body.get("stream"):
+            text = "".join([token async for token in tokens()])
+            return {**base, "object": "chat.completion", "usage": usage,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]}
+
+        async def events():
+            chunk = {**base, "object": "chat.completion.chunk"}
+            async for token in tokens():
+                yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]})}\n\n"
+            yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        if (response := failure()) is not None:
+            return response
+        base = {"model": body.get("model", "stub"), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        done = {**base, "done": True, "done_reason": "stop", "prompt_eval_count": prompt_tokens(body), "eval_count": stub.output_tokens}
+        if body.get("stream") is False:
+            text = "".join([token async for token in tokens()])
+            return {**done, "message": {"role": "assistant", "content": text}}
+
+        async def lines():
+            async for token in tokens():
+                yield json.dumps({**base, "done": False, "message": {"role": "assistant", "content": token}}) + "\n"
+            yield json.dumps({**done, "message": {"role": "assistant", "content": ""}}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+# %% ../../nbs/08_bench.ipynb 9
+class StubServer:
+    """Stub LLM server running in a background thread"""
+
+    def __init__(self, stub: Optional[StubConfig] = None, host: str = "127.0.0.1", port: Optional[int] = None):
+        """Configure the server, pick a free port when `port` is None"""
+        self.stub = stub or StubConfig()
+        self.host = host
+        if port is None:
+            with socket.socket() as s:
+                s.bind((host, 0))
+                port = s.getsockname()[1]
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(create_stub_app(self.stub), host=host, port=port, log_level="warning"))
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, the Ollama host"""
+        return f"http://{self.host}:{self.port}"
+
+    def model_config(self, provider: str = "openai", **kwargs) -> ModelConfig:
+        """A ModelConfig that points a client of the `openai` or `ollama` API at this server"""
+        if provider == "openai":
+            return ModelConfig(model_name="stub", provider="huggingface", api_base_url=f"{self.url}/v1", **kwargs)
+        if provider == "ollama":
+            return ModelConfig(model_name="stub", provider="ollama", api_base_url=self.url, **kwargs)
+        raise ValueError(f"The stub server has no {provider} API, use 'openai' or 'ollama'")
+
+    def start(self) -> "StubServer":
+        """Start serving and wait until the server accepts connections"""
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError(f"The stub server could not start on port {self.port}")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self.server.should_exit = True
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+# %% ../../nbs/08_bench.ipynb 11
+async def measure(request: Callable[[], AsyncIterator[Any]], requests: int = 50, concurrency: int = 8) -> Dict[str, Any]:
+    """Run `requests` requests with at most `concurrency` at a time and summarize their timings"""
+    semaphore = asyncio.Semaphore(concurrency)
+    ttfts, latencies, items, errors = [], [], 0, 0
+
+    async def one():
+        nonlocal items, errors
+        async with semaphore:
+            start, first, count = time.perf_counter(), None, 0
+            try:
+                async for _ in request():
+                    if first is None:
+                        first = time.perf_counter() - start
+                    count += 1
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            ttfts.append(latencies[-1] if first is None else first)
+            items += count
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    duration = time.perf_counter() - start
+    return dict(requests=requests, concurrency=concurrency, errors=errors, duration=duration,
+                throughput=len(latencies) / duration, items_per_second=items / duration,
+                ttft_p50=percentile(ttfts, 50), ttft_p99=percentile(ttfts, 99),
+                latency_p50=percentile(latencies, 50), latency_p99=percentile(latencies, 99))
+
+# %% ../../nbs/08_bench.ipynb 12
+def app_request(app: BaseChatApp, message: str, history: Optional[List[Dict[str, str]]] = None) -> Callable[[], AsyncIterator[str]]:
+    """A request through `BaseChatApp`, streaming when the model config streams"""
+    async def request():
+        if app.config.model.stream:
+            async for chunk in app.agenerate_stream(message, history):
+                yield chunk
+        else:
+            yield await app.agenerate_response(message, history)
+    return request
+
+def ui_request(chat: GradioChat, message: str, history: Optional[List[Dict[str, str]]] = None) -> Callable[[], AsyncIterator[Any]]:
+    """A request through the event handlers of `GradioChat`, yielding the UI updates after the echo of the user message"""
+    async def request():
+        if chat.app.config.model.stream:
+            updates = chat.arespond_stream(message, history or [])
+            await anext(updates)
+            async for update in updates:
+                yield update
+        else:
+            yield await chat.arespond(message, history or [])
+    return request
+
+# %% ../../nbs/08_bench.ipynb 14
+def _history(turns: int) -> List[Dict[str, str]]:
+    """A conversation of `turns` question and answer pairs"""
+    return [m for i in range(turns) for m in ({"role": "user", "content": f"Question {i}: " + "what about this? " * 10},
+                                              {"role": "assistant", "content": f"Answer {i}: " + "it is like that. " * 20})]
+
+async def run_benchmarks(
+        stub: Optional[StubConfig] = None,
+        providers: List[str] = ["openai", "ollama"], # APIs of the stub server to use
+        layers: List[str] = ["app", "ui"], # Measure through `BaseChatApp` and/or `GradioChat`
+        concurrency: List[int] = [1, 8, 32],
+        history_turns: List[int] = [0, 20],
+        context_chars: List[int] = [0, 100_000],
+        requests: int = 64, # Requests per combination
+        stream: bool = True
+        ) -> List[Dict[str, Any]]:
+    """Measure all combinations of the settings against a stub server, one result row per combination"""
+    rows = []
+    with StubServer(stub) as server, tempfile.TemporaryDirectory() as tmp:
+        for chars in context_chars:
+            context_file = Path(tmp)/f"context_{chars}.md"
+            context_file.write_text(("# Section\n\n" + "Some facts about the subject. " * 30 + "\n\n") * (chars // 1000) if chars else "")
+            for provider in providers:
+                for turns in history_turns:
+                    for layer in layers:
+                        for level in concurrency:
+                            config = ChatAppConfig(app_name="Benchmark", system_prompt="You are a helpful assistant.",
+                                                   context_files=[context_file] if chars else [],
+                                                   concurrency_limit=None, model=server.model_config(provider, stream=stream))
+                            app = BaseChatApp(config)
+                            request = (app_request(app, "How does this work?", _history(turns)) if layer == "app"
+                                       else ui_request(GradioChat(app), "How does this work?", _history(turns)))
+                            result = await measure(request, requests=requests, concurrency=level)
+                            rows.append(dict(provider=provider, layer=layer, history_turns=turns, context_chars=chars, **result))
+    return rows
+
+def format_results(rows: List[Dict[str, Any]]) -> str:
+    """The result rows of `run_benchmarks` as a Markdown table, times in milliseconds"""
+    columns = ["provider", "layer", "history_turns", "context_chars", "concurrency", "errors", "throughput",
+               "ttft_p50", "ttft_p99", "latency_p50", "latency_p99"]
+    def cell(column, value):
+        if value is None:
+            return "-"
+        if column.startswith(("ttft", "latency")):
+            return f"{value * 1000:.1f}"
+        return f"{value:.1f}" if isinstance(value, float) else str(value)
+    lines = ["| " + " | ".join(columns) + " |", "|" + " --- |" * len(columns)]
+    lines += ["| " + " | ".join(cell(c, row[c]) for c in columns) + " |" for row in rows]
+    return "\n".join(lines)
+
+# %% ../../nbs/08_bench.ipynb 18
+@call_parse
+def bench_main(
+        providers: str = "openai ollama", # APIs of the stub server, separated by spaces
+        layers: str = "app ui", # Layers to measure: app and/or ui
+        concurrency: str = "1 8 32", # Concurrency levels
+        history_turns: str = "0 20", # Earlier question and answer pairs in the conversation
+        context_chars: str = "0 100000", # Sizes of the context files in characters
+        requests: int = 64, # Requests per combination
+        latency: float = 0.05, # Seconds before the first token
+        tokens_per_second: float = 200, # Token rate of the stub, 0 for as fast as possible
+        output_tokens: int = 64, # Tokens per answer
+        failure_rate: float = 0.0, # Fraction of requests that fail
+        no_stream: bool = False, # Request complete answers instead of streams
+        output: str = None # Write the result rows to this JSON file
+        ):
+    """Benchmark gradiochat against a local stub LLM server"""
+    stub = StubConfig(latency=latency, tokens_per_second=tokens_per_second or None, output_tokens=output_tokens, failure_rate=failure_rate)
+    ints = lambda s: [int(v) for v in str(s).split()]
+    rows = asyncio.run(run_benchmarks(stub, providers.split(), layers.split(), ints(concurrency), ints(history_turns),
+                                      ints(context_chars), requests=requests, stream=not no_stream))
+    print(format_results(rows))
+    if output:
+        Path(output).write_text(json.dumps(rows, indent=2))
@@ -0,0 +1,393 @@
+"""Optional cache in front of the LLM clients, so repeated deterministic requests don't go to the provider."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/03_cache.ipynb.
+
+# %% auto 0
+__all__ = ['completion_cache_key', 'MemoryCache', 'SQLiteCache', 'get_cache', 'CachedClient', 'hashing_vector', 'SemanticCache']
+
+# %% ../../nbs/03_cache.ipynb 3
+from typing import Generator, AsyncIterator, List, Dict, Optional, Tuple, Any, Callable
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from .config import ModelConfig, Message, CacheConfig, message_dicts
+
+# %% ../../nbs/03_cache.ipynb 6
+_SAMPLING_PARAMS = ["temperature", "max_completion_tokens", "top_p", "top_k", "frequency_penalty", "stop"]
+
+def _normalize(value: Any) -> Any:
+    """Make equal numbers hash the same, so `temperature=0` and `temperature=0.0` share a key"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def completion_cache_key(
+        messages: List[Message], # The prepared messages that are sent to the provider
+        model_config: ModelConfig,
+        **kwargs # Per-request overrides of the sampling parameters
+        ) -> str:
+    """Hash the messages, the model and the effective sampling parameters into a cache key"""
+    request = {
+        "provider": model_config.provider,
+        "api_base_url": model_config.api_base_url,
+        "model": model_config.model_name,
+        "messages": message_dicts(messages),
+        "params": {name: _normalize(kwargs.get(name, getattr(model_config, name))) for name in _SAMPLING_PARAMS},
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+# %% ../../nbs/03_cache.ipynb 9
+class MemoryCache:
+    """In-memory completion cache with LRU and TTL eviction"""
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = 86400):
+        """Initialize an empty cache"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for the key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl is not None and time.time() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a completion"""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached completions"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# %% ../../nbs/03_cache.ipynb 10
+class SQLiteCache:
+    """Completion cache stored in a SQLite database with LRU and TTL eviction"""
+
+    def __init__(self, path: Path, max_entries: int = 1000, ttl: Optional[float] = 86400):
+        """Open or create the cache database"""
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS completions "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for the key, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a completion"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)", (key, value, now, now))
+            if self.ttl is not None:
+                self._db.execute("DELETE FROM completions WHERE created < ?", (now - self.ttl,))
+            self._db.execute("DELETE FROM completions WHERE key NOT IN "
+                             "(SELECT key FROM completions ORDER BY accessed DESC LIMIT ?)", (self.max_entries,))
+
+    def clear(self) -> None:
+        """Remove all cached completions"""
+        with self._lock:
+            self._db.execute("DELETE FROM completions")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+# %% ../../nbs/03_cache.ipynb 13
+_caches: Dict[Tuple, Any] = {}
+_caches_lock = threading.Lock()
+
+def get_cache(cache_config: CacheConfig) -> Any:
+    """Return the shared cache backend for a cache configuration"""
+    if cache_config.backend == "sqlite" and cache_config.path is None:
+        raise ValueError("The sqlite cache backend requires a path")
+    key = (cache_config.backend, str(cache_config.path), cache_config.max_entries, cache_config.ttl)
+    with _caches_lock:
+        if key not in _caches:
+            if cache_config.backend == "sqlite":
+                _caches[key] = SQLiteCache(cache_config.path, cache_config.max_entries, cache_config.ttl)
+            else:
+                _caches[key] = MemoryCache(cache_config.max_entries, cache_config.ttl)
+        return _caches[key]
+
+# %% ../../nbs/03_cache.ipynb 15
+class CachedClient:
+    """LLM client wrapper that answers repeated requests from a completion cache"""
+
+    def __init__(self,
+            client: Any, # Client following LLMClientProtocol and AsyncLLMClientProtocol
+            cache: Any, # Cache backend such as MemoryCache or SQLiteCache
+            model_config: ModelConfig,
+            cache_config: CacheConfig
+            ):
+        """Wrap a client with a cache"""
+        self.client = client
+        self.cache = cache
+        self.model_config = model_config
+        self.cache_config = cache_config
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, messages: List[Message], **kwargs) -> Optional[str]:
+        """Cache key of the request, or None if this request should not be cached"""
+        temperature = kwargs.get("temperature", self.model_config.temperature)
+        if self.cache_config.deterministic_only and temperature != 0:
+            return None
+        return completion_cache_key(messages, self.model_config, **kwargs)
+
+    def _lookup(self, key: Optional[str]) -> Optional[str]:
+        """Look up a key and keep track of hits and misses"""
+        if key is None:
+            return None
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _replay(self, text: str) -> Generator[str, None, None]:
+        """Split a cached completion in chunks"""
+        size = self.cache_config.replay_chunk_size
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+
+    def chat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a chat completion, answering from the cache if possible"""
+        key = self._key(messages, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        result = self.client.chat_completion(messages, **kwargs)
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+    def chat_completion_stream(self, messages: List[Message], **kwargs) -> Generator[str, None, None]:
+        """Generate a streaming chat completion, replaying it from the cache if possible"""
+        key = self._key(messages, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield from self._replay(cached)
+            return
+        parts = []
+        stream = self.client.chat_completion_stream(messages, **kwargs)
+        try:
+            for chunk in stream:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()
+        if key is not None:
+            self.cache.set(key, "".join(parts))
+
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a chat completion without blocking the event loop, answering from the cache if possible"""
+        key = self._key(messages, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        result = await self.client.achat_completion(messages, **kwargs)
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Generate a streaming chat completion without blocking the event loop, replaying it from the cache if possible"""
+        key = self._key(messages, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            for chunk in self._replay(cached):
+                yield chunk
+            return
+        parts = []
+        stream = self.client.achat_completion_stream(messages, **kwargs)
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        if key is not None:
+            self.cache.set(key, "".join(parts))
+
+# %% ../../nbs/03_cache.ipynb 18
+_WORD = re.compile(r"\w+")
+
+def hashing_vector(
+        text: str,
+        dimension: int = 1024 # Number of buckets the features are hashed into
+        ) -> Any:
+    """Unit vector of the words, word pairs and character trigrams of a text, hashed into a fixed number of buckets"""
+    import numpy as np
+    words = _WORD.findall(text.lower())
+    features = [f"w:{w}" for w in words] + [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    features += [f"c:{padded[i:i + 3]}" for w in words for padded in [f" {w} "] for i in range(len(padded) - 2)]
+    vector = np.zeros(dimension, dtype=np.float32)
+    if features:
+        # crc32 instead of hash(), which differs between processes
+        hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+        # The sign taken from the highest bit makes collisions cancel out on average instead of adding up
+        np.add.at(vector, hashes % dimension, np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# %% ../../nbs/03_cache.ipynb 21
+class SemanticCache:
+    """In-memory index of answers to earlier questions, looked up by the similarity of the question"""
+
+    def __init__(self,
+            threshold: float = 0.9, # Minimum cosine similarity between two questions to reuse the answer
+            max_entries: int = 1000,
+            ttl: Optional[float] = 86400,
+            dimension: int = 1024, # Size of the vectors of `hashing_vector`
+            embed: Optional[Callable[[str], Any]] = None # Function that turns a text into a vector, `hashing_vector` when None
+            ):
+        """Initialize an empty cache, the index is allocated when the first answer is stored"""
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed or partial(hashing_vector, dimension=dimension)
+        self.hits = 0
+        self.misses = 0
+        self._vectors = None # One unit vector per row
+        self._groups = None # Group id of each row, -1 for a free row
+        self._created = None
+        self._used = None # Tick of the last use of each row, for LRU eviction
+        self._answers: List[Optional[str]] = [None] * max_entries
+        self._group_ids: Dict[Tuple[str, str], int] = {} # (namespace, scope) -> group id
+        self._next_group = 0
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def vector(self, text: str) -> Any:
+        """The unit vector of a text"""
+        import numpy as np
+        vector = np.asarray(self.embed(text), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace: str, scope: str, vector: Any) -> Optional[str]:
+        """Return the answer to the most similar earlier question of the namespace and scope, or None"""
+        import numpy as np
+        with self._lock:
+            group = self._group_ids.get((namespace, scope))
+            if group is not None:
+                rows = self._groups == group
+                if self.ttl is not None:
+                    rows &= self._created >= time.time() - self.ttl
+                rows = np.flatnonzero(rows)
+                if len(rows):
+                    scores = self._vectors[rows] @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        self._tick += 1
+                        self._used[rows[best]] = self._tick
+                        self.hits += 1
+                        return self._answers[rows[best]]
+            self.misses += 1
+            return None
+
+    def set(self, namespace: str, scope: str, vector: Any, answer: str) -> None:
+        """Store the answer to a question"""
+        import numpy as np
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._groups = np.full(self.max_entries, -1, dtype=np.int64)
+                self._created = np.zeros(self.max_entries)
+                self._used = np.zeros(self.max_entries, dtype=np.int64)
+            now = time.time()
+            free = self._groups < 0
+            if self.ttl is not None:
+                free |= self._created < now - self.ttl
+            free = np.flatnonzero(free)
+            row = int(free[0]) if len(free) else int(np.argmin(self._used))
+            self._free(row)
+            key = (namespace, scope)
+            if key not in self._group_ids:
+                self._group_ids[key] = self._next_group
+                self._next_group += 1
+            self._tick += 1
+            self._vectors[row] = vector
+            self._groups[row] = self._group_ids[key]
+            self._created[row] = now
+            self._used[row] = self._tick
+            self._answers[row] = answer
+
+    def _free(self, row: int) -> None:
+        """Empty a row, and forget its group when it was the last row of the group"""
+        group = int(self._groups[row])
+        if group < 0:
+            return
+        self._groups[row] = -1
+        self._answers[row] = None
+        if not (self._groups == group).any():
+            self._group_ids = {key: g for key, g in self._group_ids.items() if g != group}
+
+    def invalidate(self, namespace: str) -> None:
+        """Remove all answers of a namespace, for example after the system prompt changed"""
+        import numpy as np
+        with self._lock:
+            groups = [g for (n, _), g in self._group_ids.items() if n == namespace]
+            if groups and self._groups is not None:
+                rows = np.flatnonzero(np.isin(self._groups, groups))
+                self._groups[rows] = -1
+                for row in rows:
+                    self._answers[row] = None
+            self._group_ids = {key: g for key, g in self._group_ids.items() if key[0] != namespace}
+
+    def clear(self) -> None:
+        """Remove all cached answers"""
+        with self._lock:
+            if self._groups is not None:
+                self._groups[:] = -1
+            self._answers = [None] * self.max_entries
+            self._group_ids.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return 0 if self._groups is None else int((self._groups >= 0).sum())
@@ -3,15 +3,15 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/00_config.ipynb.
 
 # %% auto 0
-__all__ = ['ModelConfig', 'Message', 'ChatAppConfig']
+__all__ = ['ROLES', 'ModelConfig', 'Message', 'ChatMessage', 'message_dicts', 'SemanticCacheConfig', 'CacheConfig',
+           'RetrievalConfig', 'RoutingConfig', 'ConversationLogConfig', 'SchedulerConfig', 'ChatAppConfig',
+           'HostConfig']
 
 # %% ../../nbs/00_config.ipynb 3
 from pydantic import BaseModel, Field
-from typing import Optional, List, Tuple, Literal, Any
+from typing import Optional, List, Dict, Tuple, Literal, Any, Union, Callable
 import os
-import gradio as gr
 from pathlib import Path
-from dotenv import load_dotenv
 
 # %% ../../nbs/00_config.ipynb 9
 class ModelConfig(BaseModel):
@@ -26,7 +26,24 @@ class ModelConfig(BaseModel):
     top_k: int = Field(default=50, description="Limits the number of choices for the next predicted token. Not available for OpenAI API")
     frequency_penalty: float = Field(default=0, description="Reduces the likelihood of repeating prompt text or getting stuck in a loop [-2 -> 2]")
     stop: Optional[List[str]] = Field(default=["\nUser:", "<|endoftext|>"], description="Sequences to stop generation")
-    stream: Optional[bool] = Field(default=None, description="If set to true, the model response data will be streamed to the client as it is generated using server-sent events.")
+    max_context_tokens: Optional[int] = Field(default=None, description="Context window of the model. The oldest messages of long conversations are dropped so prompt and completion fit. None sends the full history")
+    stream: bool = Field(default=True, description="If set to true, the model response data will be streamed to the client as it is generated using server-sent events.")
+    connect_timeout: float = Field(default=10.0, description="Seconds to wait for a connection to the API server")
+    read_timeout: Optional[float] = Field(default=120.0, description="Seconds to wait for data from the API server. None waits indefinitely")
+    max_connections: int = Field(default=100, description="Maximum number of connections in the shared HTTP pool for this provider")
+    max_keepalive_connections: int = Field(default=20, description="Maximum number of idle keep-alive connections kept in the shared HTTP pool")
+    http2: bool = Field(default=True, description="Use HTTP/2 when the server and the optional `h2` package support it")
+    first_token_timeout: Optional[float] = Field(default=None, description="Seconds to wait for the first token of a streamed answer before the request counts as failed. None waits as long as `read_timeout`")
+    max_retries: int = Field(default=2, description="Times a request that failed with a timeout, connection error, 429 or 5xx is retried, as long as no tokens were received")
+    retry_base_delay: float = Field(default=0.5, description="Upper bound in seconds of the random wait before the first retry, doubled for every next retry")
+    retry_max_delay: float = Field(default=8.0, description="Maximum wait in seconds before a retry")
+    max_concurrent_requests: Optional[int] = Field(default=None, description="Maximum number of requests to this provider in flight at the same time, shared by all apps using it. None removes the limit")
+    max_queued_requests: int = Field(default=32, description="Requests that may wait for a free slot when `max_concurrent_requests` is reached. Requests beyond that are refused")
+    queue_timeout: Optional[float] = Field(default=30.0, description="Seconds a request waits for a free slot before it is refused. None waits indefinitely")
+    hedge_percentile: Optional[float] = Field(default=None, description="Send a duplicate request when the first token takes longer than this percentile of recent first token times, e.g. 95. None disables hedging")
+    hedge_delay: float = Field(default=1.0, description="Seconds to wait for the first token before hedging, until enough first token times are known for the percentile")
+    prompt_caching: bool = Field(default=False, description="Keep the system message identical between requests so the provider can reuse its prompt cache, and record cache usage")
+    keep_alive: Optional[Union[str, float]] = Field(default=None, description="How long Ollama keeps the model and its prompt cache loaded, e.g. '30m' or seconds. None uses the server default")
 
     
     @property
@@ -44,7 +61,85 @@ class Message(BaseModel):
     role: Literal["system", "user", "assistant"] = Field(..., description="Role of the message sender")
     content: str = Field(..., description="Content of the message")
 
-# %% ../../nbs/00_config.ipynb 17
+# %% ../../nbs/00_config.ipynb 16
+ROLES = ("system", "user", "assistant")
+
+class ChatMessage(dict):
+    """A message as the role/content dict the provider SDKs take, with the attributes of `Message`. Not validated"""
+    __slots__ = ()
+
+    def __init__(self, role: str, content: str):
+        super().__init__(role=role, content=content)
+
+    @property
+    def role(self) -> str: return self["role"]
+
+    @property
+    def content(self) -> str: return self["content"]
+
+def message_dicts(messages: List[Union[Message, ChatMessage, dict]]) -> List[dict]:
+    """The messages as role/content dicts for a provider SDK, without copying the ones that already are"""
+    return [m if isinstance(m, dict) else {"role": m.role, "content": m.content} for m in messages]
+
+# %% ../../nbs/00_config.ipynb 21
+class SemanticCacheConfig(BaseModel):
+    """Configuration for the semantic cache of near-duplicate questions"""
+    threshold: float = Field(default=0.9, description="Minimum cosine similarity between two user messages to reuse the answer")
+    max_entries: int = Field(default=1000, description="Maximum number of cached answers, the least recently used ones are evicted first")
+    ttl: Optional[float] = Field(default=86400, description="Seconds a cached answer stays valid. None keeps entries until evicted by `max_entries`")
+    max_history_messages: int = Field(default=2, description="Only use the cache when the conversation has at most this many previous messages. The previous messages must match exactly")
+    dimension: int = Field(default=1024, description="Size of the vectors of the built-in hashing vectorizer")
+    embed: Optional[Callable[[str], Any]] = Field(default=None, description="Function that turns a text into a vector, such as a local sentence-transformers model. None uses the built-in hashing vectorizer, which matches rephrasings with mostly the same words")
+
+# %% ../../nbs/00_config.ipynb 23
+class CacheConfig(BaseModel):
+    """Configuration for the completion cache"""
+    backend: Literal["memory", "sqlite"] = Field(default="memory", description="Where cached completions are stored")
+    path: Optional[Path] = Field(default=None, description="SQLite database file, required for the sqlite backend")
+    max_entries: int = Field(default=1000, description="Maximum number of cached completions, the least recently used ones are evicted first")
+    ttl: Optional[float] = Field(default=86400, description="Seconds a cached completion stays valid. None keeps entries until evicted by `max_entries`")
+    deterministic_only: bool = Field(default=True, description="Only cache requests with temperature 0")
+    replay_chunk_size: int = Field(default=32, description="Number of characters per chunk when a cached completion is replayed as a stream")
+    semantic: Optional[SemanticCacheConfig] = Field(default=None, description="Also answer near-duplicate questions from a semantic cache, disabled when None")
+
+# %% ../../nbs/00_config.ipynb 27
+class RetrievalConfig(BaseModel):
+    """Configuration for retrieval over the context files"""
+    top_k: int = Field(default=4, description="Number of context chunks added to each request")
+    chunk_size: int = Field(default=1500, description="Maximum number of characters per context chunk")
+    index_path: Optional[Path] = Field(default=None, description="File to store the search index in, so it isn't rebuilt on restart. None keeps it in memory only")
+
+# %% ../../nbs/00_config.ipynb 31
+class RoutingConfig(BaseModel):
+    """Configuration for routing requests over several model endpoints"""
+    models: List[ModelConfig] = Field(default=[], description="Endpoints to use in addition to `ChatAppConfig.model`")
+    strategy: Literal["least_outstanding", "latency"] = Field(default="least_outstanding", description="Send each request to the endpoint with the fewest requests in flight, or pick endpoints at random weighted by their recent latency")
+    failure_threshold: int = Field(default=3, description="Consecutive failures after which an endpoint is taken out of rotation")
+    recovery_time: float = Field(default=30.0, description="Seconds before a failed endpoint gets a trial request again")
+    health_check_interval: Optional[float] = Field(default=None, description="Seconds between active health checks of all endpoints. None relies on the results of real requests only")
+
+# %% ../../nbs/00_config.ipynb 35
+class ConversationLogConfig(BaseModel):
+    """Configuration for the append-only conversation log"""
+    backend: Literal["jsonl", "sqlite"] = Field(default="jsonl", description="Whether the turns are appended to a JSONL file or a SQLite database")
+    path: Path = Field(..., description="File the conversation log is written to")
+    flush_interval: float = Field(default=0.5, description="Seconds the writer thread waits to collect more turns before writing them to disk together")
+    max_pending: int = Field(default=10000, description="Maximum number of turns waiting to be written. Turns arriving while the queue is full are dropped and counted, instead of blocking the chat")
+    resume: bool = Field(default=True, description="Restore the conversation of a browser from the log when the page is opened again")
+    secret_env_var: Optional[str] = Field(default=None, description="Environment variable with the key that encrypts the conversation id stored in the browser. Set it to resume conversations after a restart of the server, a random key is used when None")
+
+# %% ../../nbs/00_config.ipynb 39
+class SchedulerConfig(BaseModel):
+    """Configuration for fair scheduling and rate limiting of generation requests"""
+    max_concurrent: int = Field(default=8, description="Generations of the app that run at the same time, the others wait in the fair queue")
+    max_queued: int = Field(default=64, description="Requests that may wait in the queue, more are refused with the busy message")
+    queue_timeout: Optional[float] = Field(default=60.0, description="Seconds a request may wait in the queue before it is refused. None waits indefinitely")
+    session_tokens_per_minute: Optional[int] = Field(default=50000, description="Prompt plus completion tokens a session may use per minute, with bursts of up to a minute's worth. None removes the limit")
+    ip_tokens_per_minute: Optional[int] = Field(default=200000, description="Prompt plus completion tokens all sessions of one IP address may use per minute. None removes the limit")
+    queue_message: str = Field(default="Waiting for my turn, you are number {position} in the queue...", description="Shown in the chat while a streamed request waits, `{position}` is replaced by its place in the queue")
+    rate_limit_message: str = Field(default="You are sending a lot of requests. Please try again in {seconds} seconds.", description="Shown when a session or IP address goes over its token rate, `{seconds}` is replaced by the time until it may send again")
+
+# %% ../../nbs/00_config.ipynb 43
 class ChatAppConfig(BaseModel):
     """Main configuration for a chat application"""
     app_name: str = Field(..., description="Name of the application")
@@ -52,8 +147,28 @@ class ChatAppConfig(BaseModel):
     system_prompt: str = Field(..., description="System prompt for the LLM")
     starter_prompt: Optional[str] = Field(default=None, description="Initial prompt to start the conversation")
     context_files: List[Path] = Field(default=[], description="List of markdown files for additional context")
+    context_reload_interval: Optional[float] = Field(default=5.0, description="Seconds between checks of the context files for changes. None loads them only once")
     model: ModelConfig
     theme: Optional[Any] = Field(default=None, description="Gradio theme to use")
     logo_path: Optional[Path] = Field(default=None, description="Path to logo image")
     show_system_prompt: bool = Field(default=True, description="Whether to show system prompt in UI")
     show_context: bool = Field(default=True, description="Whether to show context in UI")
+    retrieval: Optional[RetrievalConfig] = Field(default=None, description="Send only the context chunks relevant to the user message instead of all context files. Disabled when None")
+    routing: Optional[RoutingConfig] = Field(default=None, description="Spread requests over several endpoints with failover. Only `model` is used when None")
+    cache: Optional[CacheConfig] = Field(default=None, description="Cache completions for repeated requests, disabled when None")
+    conversation_log: Optional[ConversationLogConfig] = Field(default=None, description="Append every turn to a conversation log on the server, used for resume, export and analytics. Disabled when None")
+    scheduler: Optional[SchedulerConfig] = Field(default=None, description="Queue generation requests fairly between users and limit the tokens per session and IP address. First come, first served without limits when None")
+    stream_frame_interval: float = Field(default=0.04, description="Seconds between updates of the chat while a response streams in. Tokens arriving in between are sent together, 0 sends every token")
+    stream_frame_chars: int = Field(default=2048, description="Send an update before the frame interval has passed once this many characters are waiting")
+    metrics_path: Optional[str] = Field(default=None, description="Serve Prometheus metrics of all chat requests at this path of the Gradio server, e.g. '/metrics'. Disabled when None")
+    busy_message: str = Field(default="The assistant is very busy at the moment. Please try again in a little while.", description="Message shown in the UI when the provider is overloaded or keeps failing")
+    concurrency_limit: Optional[int] = Field(default=16, description="Maximum number of chat requests the Gradio queue handles at the same time. None removes the limit")
+
+# %% ../../nbs/00_config.ipynb 49
+class HostConfig(BaseModel):
+    """Configuration for serving several chat applications from one server"""
+    apps: Dict[str, ChatAppConfig] = Field(..., description="Chat applications by the path they are served at, e.g. {'/support': ChatAppConfig(...)}")
+    max_workers: Optional[int] = Field(default=64, description="Chat requests all apps together handle at the same time. None leaves the limit to the queue of each app")
+    max_queued: int = Field(default=256, description="Chat requests that may wait for a worker, more are refused with the busy message of the app")
+    queue_timeout: Optional[float] = Field(default=30.0, description="Seconds a chat request may wait for a worker. None waits indefinitely")
+    metrics_path: Optional[str] = Field(default=None, description="Serve Prometheus metrics of the chat requests of all apps at this path, e.g. '/metrics'. Disabled when None")
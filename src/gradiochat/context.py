@@ -0,0 +1,111 @@
+"""Load the context files lazily and pick up changes to them while the app is running."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/06_context.ipynb.
+
+# %% auto 0
+__all__ = ['ContextFiles']
+
+# %% ../../nbs/06_context.ipynb 3
+from typing import List, Dict, Optional, Tuple, Any
+from pathlib import Path
+import hashlib
+import mmap
+import threading
+import time
+
+# %% ../../nbs/06_context.ipynb 6
+class ContextFiles:
+    """Lazily loaded, hot-reloadable text of a list of context files"""
+
+    def __init__(self,
+            files: List[Path], # Markdown files with context
+            reload_interval: Optional[float] = 5.0, # Seconds between checks for changed files, None to load them only once
+            mmap_threshold: int = 1024 * 1024 # Files of at least this many bytes are read through mmap
+            ):
+        """Initialize without reading the files"""
+        self.files = [Path(f) for f in files]
+        self.reload_interval = reload_interval
+        self.mmap_threshold = mmap_threshold
+        self.version = 0
+        self._stats: Dict[Path, Tuple[int, int]] = {}
+        self._hashes: Dict[Path, str] = {}
+        self._texts: Dict[Path, str] = {}
+        self._text: Optional[str] = None
+        self._digest: Optional[str] = None
+        self._last_check: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _read(self, file_path: Path, size: int) -> bool:
+        """Read a file, through mmap for large files, and return whether its content changed"""
+        with open(file_path, 'rb') as f:
+            if size >= self.mmap_threshold:
+                # Hash and decode straight from the mapping, without copying it into a bytes object first
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return self._update(file_path, mapped)
+            return self._update(file_path, f.read())
+
+    def _update(self, file_path: Path, data: Any) -> bool:
+        """Keep the text of a file when its hash changed, return whether it did"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self._hashes.get(file_path) == digest:
+            return False
+        self._hashes[file_path] = digest
+        self._texts[file_path] = str(data, 'utf-8')
+        return True
+
+    def _check(self) -> bool:
+        """Reload the files that changed since the last check, return whether the text changed"""
+        changed = False
+        for file_path in self.files:
+            if not (file_path.exists() and file_path.is_file()):
+                if file_path in self._texts:
+                    del self._texts[file_path], self._stats[file_path], self._hashes[file_path]
+                    changed = True
+                continue
+            stat = file_path.stat()
+            if self._stats.get(file_path) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            self._stats[file_path] = (stat.st_mtime_ns, stat.st_size)
+            changed = self._read(file_path, stat.st_size) or changed
+        return changed
+
+    def _due(self, now: float) -> bool:
+        last_check = self._last_check
+        return last_check is None or (self.reload_interval is not None and now - last_check >= self.reload_interval)
+
+    @property
+    def due(self) -> bool:
+        """Whether the next `refresh` will check the files, without touching the disk"""
+        return self._due(time.monotonic())
+
+    def refresh(self, force: bool = False) -> bool:
+        """Check the files for changes if the reload interval has passed, return whether the text changed"""
+        with self._lock:
+            now = time.monotonic()
+            first = self._last_check is None
+            if not (force or self._due(now)):
+                return False
+            self._last_check = now
+            if self._check() or first:
+                self._text = "".join(self._texts[f] + "\n\n" for f in self.files if f in self._texts)
+                self._digest = hashlib.sha256("".join(self._hashes.get(f, "") for f in self.files).encode()).hexdigest()
+                self.version += 1
+                return True
+            return False
+
+    @property
+    def text(self) -> str:
+        """The combined text of all context files, reloading changed files when due"""
+        self.refresh()
+        return self._text
+
+    @property
+    def digest(self) -> str:
+        """Hash of the content of all context files, reloading changed files when due"""
+        self.refresh()
+        return self._digest
+
+    def current(self) -> Tuple[int, Optional[str], Optional[str]]:
+        """The version, text and digest as of the last refresh, without checking the files"""
+        with self._lock:
+            return self.version, self._text, self._digest
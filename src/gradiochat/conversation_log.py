@@ -0,0 +1,271 @@
+"""Append every turn of the conversations to a JSONL file or SQLite database on the server, for resume, export and analytics."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/13_conversation_log.ipynb.
+
+# %% auto 0
+__all__ = ['ConversationLog', 'JsonlConversationLog', 'SQLiteConversationLog', 'get_conversation_log']
+
+# %% ../../nbs/13_conversation_log.ipynb 3
+from typing import Iterator, List, Dict, Optional, Tuple, Any
+from pathlib import Path
+from abc import ABC, abstractmethod
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+import warnings
+
+from .config import ConversationLogConfig
+
+# %% ../../nbs/13_conversation_log.ipynb 6
+class ConversationLog(ABC):
+    """Append-only log of conversation turns, written to disk by a background thread"""
+
+    def __init__(self,
+            path: Path, # File the turns are appended to
+            flush_interval: float = 0.5, # Seconds the writer waits to collect more turns before writing them together
+            max_pending: int = 10000 # Maximum number of turns waiting to be written, more are dropped
+            ):
+        """Open the log and start the writer thread"""
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0 # Turns not logged because the queue was full
+        self.failed = 0 # Turns not logged because writing them raised an error
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_pending)
+        self._io_lock = threading.Lock()
+        self._done = threading.Condition()
+        self._wake = threading.Event()
+        self._appended = 0
+        self._closed = False
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=f"conversation-log-{self.path.name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self,
+            session_id: str, # Conversation the turn belongs to
+            user: str, # Message of the user
+            assistant: str, # Response of the assistant
+            **fields # Extra fields stored with the turn, such as the app and model
+            ) -> bool:
+        """Queue a turn to be written, return False if it was dropped because the queue is full"""
+        record = {"session": session_id, "time": time.time(), "user": user, "assistant": assistant, **fields}
+        with self._done:
+            if self._closed:
+                raise RuntimeError(f"The conversation log {self.path} is closed")
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._appended += 1
+        return True
+
+    def _run(self) -> None:
+        """Write the queued turns in batches until the log is closed"""
+        stop = False
+        while not stop:
+            batch = []
+            record = self._queue.get()
+            while record is not None:
+                batch.append(record)
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stop = record is None
+            if batch:
+                try:
+                    self._write(batch)
+                    written, failed = len(batch), 0
+                except Exception as e:
+                    warnings.warn(f"Writing {len(batch)} turns to the conversation log {self.path} failed: {e!r}")
+                    written, failed = 0, len(batch)
+                with self._done:
+                    self.written += written
+                    self.failed += failed
+                    self._done.notify_all()
+            if not stop:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+
+    @property
+    def pending(self) -> int:
+        """Number of turns waiting to be written"""
+        with self._done:
+            return self._appended - self.written - self.failed
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all turns appended so far are written, return False on timeout"""
+        with self._done:
+            target = self._appended
+        self._wake.set()
+        with self._done:
+            return self._done.wait_for(lambda: self.written + self.failed >= target, timeout)
+
+    def close(self) -> None:
+        """Write the remaining turns and stop the writer thread"""
+        with self._done:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._wake.set()
+        self._thread.join()
+        with self._io_lock:
+            self._close()
+
+    def conversation(self,
+            session_id: str, # Conversation to return
+            timeout: Optional[float] = 5.0 # Seconds to wait for the turns appended so far to be written
+            ) -> List[Dict[str, str]]:
+        """The logged conversation of a session in the Gradio messages format"""
+        # Without an id `turns` returns the turns of all sessions, which must never end up in one user's conversation
+        if not isinstance(session_id, str) or not session_id:
+            raise ValueError(f"A conversation needs a session id, not {session_id!r}")
+        if not self.flush(timeout):
+            warnings.warn(f"The conversation log {self.path} didn't write its pending turns within {timeout}s, the latest turns of {session_id} may be missing")
+        history = []
+        for turn in self.turns(session_id):
+            history.append({"role": "user", "content": turn["user"]})
+            history.append({"role": "assistant", "content": turn["assistant"]})
+        return history
+
+    def sessions(self) -> List[str]:
+        """Ids of the logged sessions, in the order of their first turn"""
+        return list(dict.fromkeys(turn["session"] for turn in self.turns()))
+
+    @abstractmethod
+    def _open(self) -> None:
+        """Open the storage, called once before the writer thread starts"""
+
+    @abstractmethod
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Append a batch of turns to the storage"""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Close the storage after the last turns are written"""
+
+    @abstractmethod
+    def turns(self, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """The logged turns of a session, or of all sessions, in the order they were written"""
+
+# %% ../../nbs/13_conversation_log.ipynb 8
+class JsonlConversationLog(ConversationLog):
+    """Conversation log appended to a JSONL file"""
+
+    def _open(self) -> None:
+        """Open the file for appending, starting a new line after a cut off record"""
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._file = open(self.path, 'ab')
+        if self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Append the turns to the file and to the session index"""
+        with self._io_lock:
+            for record in batch:
+                offset = self._file.tell()
+                self._file.write((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+                if self._index is not None:
+                    self._index.setdefault(record["session"], []).append(offset)
+            self._file.flush()
+
+    def _close(self) -> None:
+        self._file.close()
+
+    def _scan(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """The offsets and records of all complete lines of the file"""
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError: # A line cut off by an interruption
+                    record = None
+                if record is not None:
+                    yield offset, record
+                offset += len(line)
+
+    def turns(self, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """The logged turns of a session, or of all sessions, in the order they were written"""
+        if session_id is None:
+            for _, record in self._scan():
+                yield record
+            return
+        with self._io_lock:
+            if self._index is None:
+                self._index = {}
+                for offset, record in self._scan():
+                    self._index.setdefault(record["session"], []).append(offset)
+            offsets = list(self._index.get(session_id, []))
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield json.loads(f.readline())
+
+class SQLiteConversationLog(ConversationLog):
+    """Conversation log appended to a SQLite database"""
+
+    def _open(self) -> None:
+        """Open or create the database"""
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS turns (id INTEGER PRIMARY KEY, session TEXT NOT NULL, "
+                         "time REAL NOT NULL, user TEXT NOT NULL, assistant TEXT NOT NULL, fields TEXT NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session, id)")
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert the turns in one transaction"""
+        rows = []
+        for record in batch:
+            fields = {k: v for k, v in record.items() if k not in ("session", "time", "user", "assistant")}
+            rows.append((record["session"], record["time"], record["user"], record["assistant"], json.dumps(fields, ensure_ascii=False)))
+        with self._io_lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("INSERT INTO turns (session, time, user, assistant, fields) VALUES (?, ?, ?, ?, ?)", rows)
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _close(self) -> None:
+        self._db.close()
+
+    def turns(self, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """The logged turns of a session, or of all sessions, in the order they were written"""
+        with self._io_lock:
+            if session_id is None:
+                rows = self._db.execute("SELECT session, time, user, assistant, fields FROM turns ORDER BY id").fetchall()
+            else:
+                rows = self._db.execute("SELECT session, time, user, assistant, fields FROM turns WHERE session = ? ORDER BY id", (session_id,)).fetchall()
+        for session, created, user, assistant, fields in rows:
+            yield {"session": session, "time": created, "user": user, "assistant": assistant, **json.loads(fields)}
+
+    def sessions(self) -> List[str]:
+        """Ids of the logged sessions, in the order of their first turn"""
+        with self._io_lock:
+            rows = self._db.execute("SELECT session FROM turns GROUP BY session ORDER BY MIN(id)").fetchall()
+        return [session for session, in rows]
+
+# %% ../../nbs/13_conversation_log.ipynb 10
+_logs: Dict[Tuple[str, str], ConversationLog] = {}
+_logs_lock = threading.Lock()
+
+def get_conversation_log(log_config: ConversationLogConfig) -> ConversationLog:
+    """Return the shared conversation log for a configuration"""
+    key = (log_config.backend, str(Path(log_config.path).resolve()))
+    with _logs_lock:
+        if key not in _logs or _logs[key]._closed:
+            log_class = SQLiteConversationLog if log_config.backend == "sqlite" else JsonlConversationLog
+            _logs[key] = log_class(log_config.path, log_config.flush_interval, log_config.max_pending)
+        return _logs[key]
@@ -3,10 +3,10 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/99_gradio_themesbuilder.ipynb.
 
 # %% auto 0
-__all__ = []
-
-# %% ../../nbs/99_gradio_themesbuilder.ipynb 3
-import gradio as gr
+__all__ = ['start_theme_builder']
 
 # %% ../../nbs/99_gradio_themesbuilder.ipynb 6
-gr.themes.builder()
+def start_theme_builder(**kwargs):
+    """Start the Gradio theme builder, the keyword arguments are passed to `gr.themes.builder`"""
+    import gradio as gr
+    return gr.themes.builder(**kwargs)
@@ -0,0 +1,157 @@
+"""Cut the latency tail by sending a duplicate request when the first token is late."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/11_hedging.ipynb.
+
+# %% auto 0
+__all__ = ['HedgeStats', 'HedgedClient']
+
+# %% ../../nbs/11_hedging.ipynb 3
+from typing import Generator, AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Any
+from collections import deque
+import asyncio
+import threading
+import time
+
+from .config import ModelConfig, Message
+from .metrics import percentile
+
+# %% ../../nbs/11_hedging.ipynb 6
+class HedgeStats:
+    """Thread-safe counters of hedged requests"""
+
+    def __init__(self):
+        """Initialize all counters at zero"""
+        self.requests = 0
+        self.hedged = 0 # Requests for which a duplicate was sent
+        self.wins = 0 # Hedged requests answered first by the duplicate
+        self._lock = threading.Lock()
+
+    def record(self, hedged: bool, won: bool) -> None:
+        """Record the outcome of one request"""
+        with self._lock:
+            self.requests += 1
+            self.hedged += hedged
+            self.wins += won
+
+    @property
+    def hedge_rate(self) -> float:
+        """Fraction of the requests that were hedged"""
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        """Fraction of the hedged requests that the duplicate won"""
+        return self.wins / self.hedged if self.hedged else 0.0
+
+# %% ../../nbs/11_hedging.ipynb 8
+class HedgedClient:
+    """LLM client wrapper that sends a duplicate request when the first token takes unusually long"""
+
+    def __init__(self,
+            client: Any, # Client following LLMClientProtocol and AsyncLLMClientProtocol
+            model_config: ModelConfig,
+            window: int = 200, # Number of recent first token times per mode (streaming or not) the percentile is computed over
+            min_samples: int = 20 # First token times needed before the percentile is used
+            ):
+        """Wrap a client with hedging"""
+        self.client = client
+        self.model_config = model_config
+        self.min_samples = min_samples
+        self.hedge_stats = HedgeStats()
+        # First token times of streams and complete answer times are kept apart, they are not comparable
+        self._samples = {True: deque(maxlen=window), False: deque(maxlen=window)}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def delay(self, stream: bool = True) -> float:
+        """Seconds to wait for the first token of a stream, or for the answer when not streaming, before hedging"""
+        samples = self._samples[stream]
+        if len(samples) < self.min_samples:
+            return self.model_config.hedge_delay
+        return percentile(list(samples), self.model_config.hedge_percentile)
+
+    async def _race(self, attempt: Callable[[], Awaitable[Any]], discard: Callable[[Any], Awaitable[None]], stream: bool) -> Any:
+        """Run `attempt`, and a duplicate when it is slower than the delay; return the first successful result"""
+        samples = self._samples[stream]
+        start = time.monotonic()
+        primary = asyncio.ensure_future(attempt())
+        try:
+            # Unlike wait_for, wait doesn't raise the outcome of the attempt, so a cancelled attempt isn't taken for a cancelled request
+            await asyncio.wait({primary}, timeout=self.delay(stream))
+        except BaseException:
+            primary.cancel()
+            raise
+        # An attempt that was cancelled from inside counts as failed, and the duplicate is started right away
+        if primary.done() and not primary.cancelled():
+            samples.append(time.monotonic() - start)
+            self.hedge_stats.record(hedged=False, won=False)
+            return primary.result()
+
+        hedge_start = time.monotonic()
+        hedge = asyncio.ensure_future(attempt())
+        pending, error, winner = {primary, hedge}, None, None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: t is hedge): # the primary wins a tie
+                    if task.cancelled():
+                        error = error or asyncio.CancelledError("Both hedged attempts were cancelled")
+                    elif task.exception() is not None:
+                        error = error or task.exception()
+                    elif winner is None:
+                        winner = task
+                    else:
+                        await discard(task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+        if winner is None:
+            self.hedge_stats.record(hedged=True, won=False)
+            raise error
+        samples.append(time.monotonic() - (hedge_start if winner is hedge else start))
+        self.hedge_stats.record(hedged=True, won=winner is hedge)
+        return winner.result()
+
+    def chat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a completion with the wrapped client"""
+        return self.client.chat_completion(messages, **kwargs)
+
+    def chat_completion_stream(self, messages: List[Message], **kwargs) -> Generator[str, None, None]:
+        """Stream a completion with the wrapped client"""
+        return self.client.chat_completion_stream(messages, **kwargs)
+
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a completion, hedging when the answer is late"""
+        async def nothing(result): pass
+        return await self._race(lambda: self.client.achat_completion(messages, **kwargs), nothing, stream=False)
+
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Stream a completion, hedging when the first token is late"""
+        async def attempt() -> Tuple[AsyncIterator[str], Optional[str]]:
+            stream = self.client.achat_completion_stream(messages, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await _close(stream)
+                raise
+
+        async def discard(result):
+            await _close(result[0])
+
+        stream, first = await self._race(attempt, discard, stream=True)
+        try:
+            if first is None:
+                return
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await _close(stream)
+
+
+async def _close(stream: Any) -> None:
+    if hasattr(stream, "aclose"):
+        await stream.aclose()
@@ -0,0 +1,104 @@
+"""Serve many chat applications under different paths of one server process."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/14_host.ipynb.
+
+# %% auto 0
+__all__ = ['ChatHost']
+
+# %% ../../nbs/14_host.ipynb 3
+from typing import Dict, List
+from contextlib import AsyncExitStack, asynccontextmanager
+import asyncio
+import html
+import threading
+
+import gradio as gr
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+
+from .config import HostConfig
+from .app import BaseChatApp
+from .ui import GradioChat
+from .policy import ConcurrencyLimiter
+from .metrics import mount_metrics
+
+# %% ../../nbs/14_host.ipynb 6
+class _LazyGradioApp:
+    """ASGI app that builds and starts the Gradio app of a chat on the first request to its path"""
+
+    def __init__(self, host: "ChatHost", path: str):
+        self.host = host
+        self.path = path
+        self.app = None
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if self.app is None:
+            async with self._lock:
+                if self.app is None:
+                    self.app = await self.host._start(self.path)
+        await self.app(scope, receive, send)
+
+class ChatHost:
+    """Serves many chat apps under different paths of one FastAPI server, building each app on its first visit"""
+
+    def __init__(self, config: HostConfig):
+        """Create the server without building any of the apps"""
+        for path in config.apps:
+            if not path.startswith("/") or path == "/" or path.endswith("/"):
+                raise ValueError(f"App paths look like '/name', got {path!r}")
+        self.config = config
+        self.limiter = None
+        if config.max_workers is not None:
+            self.limiter = ConcurrencyLimiter(config.max_workers, config.max_queued, config.queue_timeout)
+        self._chats: Dict[str, GradioChat] = {}
+        self._lock = threading.Lock()
+        self._stack = AsyncExitStack()
+        self.app = FastAPI(lifespan=self._lifespan)
+        self.app.add_api_route("/", self.index, methods=["GET"], response_class=HTMLResponse)
+        if config.metrics_path is not None:
+            mount_metrics(self.app, config.metrics_path)
+        for path in config.apps:
+            self.app.mount(path, _LazyGradioApp(self, path))
+
+    def chat(self, path: str) -> GradioChat:
+        """The chat app served at a path, created on first use"""
+        with self._lock:
+            if path not in self._chats:
+                self._chats[path] = GradioChat(BaseChatApp(self.config.apps[path]), limiter=self.limiter)
+            return self._chats[path]
+
+    @property
+    def built(self) -> List[str]:
+        """Paths of the apps whose interface has been built"""
+        with self._lock:
+            return [path for path, chat in self._chats.items() if chat.interface is not None]
+
+    async def _start(self, path: str) -> FastAPI:
+        """Build the interface of an app and start its Gradio server app, which is stopped with the host"""
+        blocks = self.chat(path).build_interface()
+        gradio_app = FastAPI()
+        gr.mount_gradio_app(gradio_app, blocks, path="")
+        await self._stack.enter_async_context(gradio_app.router.lifespan_context(gradio_app))
+        return gradio_app
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Stop the Gradio apps that were started when the server shuts down"""
+        async with self._stack:
+            yield
+
+    def index(self) -> str:
+        """A page that links to all apps"""
+        links = "".join(f'<li><a href="{path[1:]}/">{html.escape(config.app_name)}</a> {html.escape(config.description)}</li>'
+                        for path, config in self.config.apps.items())
+        return f"<!doctype html><html><head><title>Chat apps</title></head><body><ul>{links}</ul></body></html>"
+
+    def launch(self,
+            host: str = "127.0.0.1",
+            port: int = 7860,
+            **kwargs # Passed to `uvicorn.run`
+            ) -> None:
+        """Serve all apps with uvicorn"""
+        import uvicorn
+        uvicorn.run(self.app, host=host, port=port, **kwargs)
@@ -0,0 +1,263 @@
+"""Timing events for every chat request, pluggable hooks and an optional Prometheus endpoint."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/07_metrics.ipynb.
+
+# %% auto 0
+__all__ = ['prometheus_metrics', 'RequestMetrics', 'add_metrics_hook', 'remove_metrics_hook', 'emit', 'instrument_stream',
+           'ainstrument_stream', 'percentile', 'PrometheusMetrics', 'mount_metrics']
+
+# %% ../../nbs/07_metrics.ipynb 3
+from typing import List, Dict, Optional, Tuple, Callable, Iterator, AsyncIterator, Any
+import asyncio
+import bisect
+import threading
+import time
+import warnings
+
+# %% ../../nbs/07_metrics.ipynb 6
+_completion_chunks: Dict[Tuple[str, str], Tuple[int, float]] = {} # (app, model) -> number and mean length in chunks of the completed streams
+_completion_chunks_lock = threading.Lock()
+
+def _expected_chunks(app_name: str, model_name: str, chunks: Optional[int] = None) -> Optional[float]:
+    """Mean length in chunks of the completed streams of an app and model, after adding `chunks` of a completed stream"""
+    with _completion_chunks_lock:
+        count, mean = _completion_chunks.get((app_name, model_name), (0, 0.0))
+        if chunks is not None:
+            count += 1
+            mean += (chunks - mean) / count
+            _completion_chunks[(app_name, model_name)] = (count, mean)
+        return mean if count else None
+
+class RequestMetrics:
+    """Timings and sizes of a single chat request"""
+
+    def __init__(self, app_name: str, model_name: str, provider: str, stream: bool,
+            max_tokens: Optional[int] = None # Completion token limit of the request, caps the estimate of `tokens_saved`
+            ):
+        """Start timing a request"""
+        self.app_name = app_name
+        self.model_name = model_name
+        self.provider = provider
+        self.stream = stream
+        self.max_tokens = max_tokens
+        self.start = time.perf_counter()
+        self.prepare_time: Optional[float] = None
+        self.prompt_messages = 0
+        self.prompt_chars = 0
+        self.ttft: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.gaps: List[float] = []
+        self.chunks = 0
+        self.output_chars = 0
+        self.status: Optional[str] = None
+        self.error: Optional[str] = None
+        self.expected_chunks: Optional[float] = None # Mean length of the completed streams of the app and model when this one was cancelled
+        self._last_chunk: Optional[float] = None
+
+    def prepared(self, messages: List[Any]) -> None:
+        """Record that the messages for the provider are ready"""
+        self.prepare_time = time.perf_counter() - self.start
+        self.prompt_messages = len(messages)
+        self.prompt_chars = sum(len(m.content) for m in messages)
+
+    def chunk(self, text: str) -> None:
+        """Record a chunk of output, or the complete answer of a non-streaming request"""
+        now = time.perf_counter()
+        if self._last_chunk is None:
+            self.ttft = now - self.start
+        else:
+            self.gaps.append(now - self._last_chunk)
+        self._last_chunk = now
+        self.chunks += 1
+        self.output_chars += len(text)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Record the end of the request and pass the metrics to the hooks"""
+        self.latency = time.perf_counter() - self.start
+        if error is None:
+            self.status = "ok"
+            if self.stream:
+                _expected_chunks(self.app_name, self.model_name, self.chunks)
+        elif isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+            self.status = "cancelled"
+            self.expected_chunks = _expected_chunks(self.app_name, self.model_name)
+        else:
+            self.status, self.error = "error", type(error).__name__
+        emit(self)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Output chunks per second after the first one"""
+        if self.chunks < 2 or self.ttft is None or self.latency is None or self.latency <= self.ttft:
+            return None
+        return (self.chunks - 1) / (self.latency - self.ttft)
+
+    @property
+    def tokens_saved(self) -> int:
+        """Estimate of the output tokens not generated because the request was cancelled"""
+        if self.status != "cancelled" or self.expected_chunks is None:
+            return 0
+        expected = self.expected_chunks if self.max_tokens is None else min(self.expected_chunks, self.max_tokens)
+        return max(0, round(expected) - self.chunks)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The metrics as a structured event, e.g. for a JSON log"""
+        return dict(app_name=self.app_name, model_name=self.model_name, provider=self.provider, stream=self.stream,
+                    status=self.status, error=self.error, prepare_time=self.prepare_time, ttft=self.ttft,
+                    latency=self.latency, max_gap=max(self.gaps, default=None), chunks=self.chunks,
+                    tokens_per_second=self.tokens_per_second, prompt_messages=self.prompt_messages,
+                    prompt_chars=self.prompt_chars, output_chars=self.output_chars, tokens_saved=self.tokens_saved)
+
+# %% ../../nbs/07_metrics.ipynb 8
+_hooks: Tuple[Callable[[RequestMetrics], None], ...] = ()
+_hooks_lock = threading.Lock()
+
+def add_metrics_hook(hook: Callable[[RequestMetrics], None]) -> None:
+    """Call `hook` with the metrics of every finished request, adding the same hook twice has no effect"""
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+
+def remove_metrics_hook(hook: Callable[[RequestMetrics], None]) -> None:
+    """Stop calling `hook`"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+def emit(metrics: RequestMetrics) -> None:
+    """Pass the metrics of a finished request to all hooks"""
+    for hook in _hooks:
+        try:
+            hook(metrics)
+        except Exception as e:
+            warnings.warn(f"Metrics hook {hook!r} failed: {e!r}")
+
+# %% ../../nbs/07_metrics.ipynb 10
+def instrument_stream(metrics: RequestMetrics, stream: Iterator[str]) -> Iterator[str]:
+    """Pass the chunks of a stream through, recording them in `metrics`"""
+    try:
+        for chunk in stream:
+            metrics.chunk(chunk)
+            yield chunk
+    except BaseException as e:
+        metrics.finish(e)
+        raise
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+    metrics.finish()
+
+async def ainstrument_stream(metrics: RequestMetrics, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Pass the chunks of an async stream through, recording them in `metrics`"""
+    try:
+        async for chunk in stream:
+            metrics.chunk(chunk)
+            yield chunk
+    except BaseException as e:
+        metrics.finish(e)
+        raise
+    finally:
+        if hasattr(stream, "aclose"):
+            await stream.aclose()
+    metrics.finish()
+
+# %% ../../nbs/07_metrics.ipynb 13
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """The `q`-th percentile (0-100) of `values`, linearly interpolated, or None when there are no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+# %% ../../nbs/07_metrics.ipynb 16
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class _Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKETS, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        lines, total = [], 0
+        for bound, count in zip(_BUCKETS + (float("inf"),), self.counts):
+            total += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {total}')
+        lines += [f"{name}_sum{{{labels}}} {self.sum}", f"{name}_count{{{labels}}} {total}"]
+        return lines
+
+
+class PrometheusMetrics:
+    """Metrics hook that aggregates request metrics in the Prometheus text format"""
+
+    _histograms = {"prepare_time": "prepare_seconds", "ttft": "time_to_first_token_seconds", "latency": "request_duration_seconds"}
+
+    def __init__(self, prefix: str = "gradiochat"):
+        """Initialize empty metrics"""
+        self.prefix = prefix
+        self.requests: Dict[Tuple[str, ...], int] = {}
+        self.counters: Dict[Tuple[str, ...], Dict[str, int]] = {}
+        self.histograms: Dict[Tuple[str, ...], Dict[str, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics: RequestMetrics) -> None:
+        """Add the metrics of a finished request"""
+        labels = (metrics.app_name, metrics.provider, metrics.model_name)
+        with self._lock:
+            key = labels + (metrics.status, metrics.error or "")
+            self.requests[key] = self.requests.get(key, 0) + 1
+            counters = self.counters.setdefault(labels, {"output_chunks": 0, "output_chars": 0, "prompt_chars": 0, "tokens_saved": 0})
+            counters["output_chunks"] += metrics.chunks
+            counters["output_chars"] += metrics.output_chars
+            counters["prompt_chars"] += metrics.prompt_chars
+            counters["tokens_saved"] += metrics.tokens_saved
+            histograms = self.histograms.setdefault(labels, {name: _Histogram() for name in [*self._histograms.values(), "inter_token_gap_seconds"]})
+            for attr, name in self._histograms.items():
+                if getattr(metrics, attr) is not None:
+                    histograms[name].observe(getattr(metrics, attr))
+            for gap in metrics.gaps:
+                histograms["inter_token_gap_seconds"].observe(gap)
+
+    @staticmethod
+    def _labels(app_name: str, provider: str, model_name: str) -> str:
+        escape = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return f'app="{escape(app_name)}",provider="{escape(provider)}",model="{escape(model_name)}"'
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        with self._lock:
+            lines = [f"# TYPE {p}_requests_total counter"]
+            for (*labels, status, error), count in self.requests.items():
+                lines.append(f'{p}_requests_total{{{self._labels(*labels)},status="{status}",error="{error}"}} {count}')
+            for name in ["output_chunks", "output_chars", "prompt_chars", "tokens_saved"]:
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                lines += [f"{p}_{name}_total{{{self._labels(*labels)}}} {counters[name]}" for labels, counters in self.counters.items()]
+            for name in [*self._histograms.values(), "inter_token_gap_seconds"]:
+                lines.append(f"# TYPE {p}_{name} histogram")
+                for labels, histograms in self.histograms.items():
+                    lines += histograms[name].lines(f"{p}_{name}", self._labels(*labels))
+        return "\n".join(lines) + "\n"
+
+
+prometheus_metrics = PrometheusMetrics()
+
+# %% ../../nbs/07_metrics.ipynb 17
+def mount_metrics(app: Any, # FastAPI app, such as the `app` of a launched Gradio interface
+        path: str = "/metrics",
+        collector: PrometheusMetrics = prometheus_metrics
+        ) -> None:
+    """Register `collector` as a metrics hook and serve it at `path` of a FastAPI app"""
+    from fastapi.responses import PlainTextResponse
+    add_metrics_hook(collector)
+    app.add_api_route(path, lambda: PlainTextResponse(collector.render(), media_type="text/plain; version=0.0.4"), methods=["GET"])
@@ -0,0 +1,279 @@
+"""Timeouts, retries and a bounded per-provider concurrency limit for the LLM clients."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/10_policy.ipynb.
+
+# %% auto 0
+__all__ = ['ProviderBusyError', 'FirstTokenTimeout', 'is_retryable', 'ConcurrencyLimiter', 'get_limiter', 'PolicyClient']
+
+# %% ../../nbs/10_policy.ipynb 3
+from typing import Generator, AsyncIterator, List, Dict, Optional, Tuple, Any
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+import asyncio
+import random
+import threading
+import time
+import httpx
+
+from .config import ModelConfig, Message
+
+# %% ../../nbs/10_policy.ipynb 6
+class ProviderBusyError(RuntimeError):
+    """Raised when a request is refused because too many requests are waiting for the same provider"""
+
+
+class FirstTokenTimeout(TimeoutError):
+    """Raised when a streamed answer doesn't start within the first token timeout"""
+
+
+_RETRYABLE_STATUS = {408, 409, 425, 429}
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed request may succeed when it is sent again"""
+    if isinstance(error, ProviderBusyError):
+        return False
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in _RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    # The OpenAI SDK wraps transport errors in its own exception types
+    return any(cls.__name__ in ("APIConnectionError", "APITimeoutError") for cls in type(error).__mro__)
+
+# %% ../../nbs/10_policy.ipynb 9
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """First in, first out semaphore with a bounded wait queue, for threads and event loops"""
+
+    def __init__(self,
+            limit: int, # Requests that may run at the same time
+            max_queued: int = 32, # Requests that may wait for a slot
+            timeout: Optional[float] = 30.0 # Seconds a request may wait, None waits indefinitely
+            ):
+        """Initialize a limiter without requests"""
+        self.limit = limit
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.active = 0
+        self.refused = 0
+        self._waiters: deque = deque() # threading.Event for threads, (loop, future) for coroutines
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot"""
+        return len(self._waiters)
+
+    def _enqueue(self, waiter: Any) -> bool:
+        """Take a free slot and return True, or queue the waiter and return False"""
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True
+            if len(self._waiters) >= self.max_queued:
+                self.refused += 1
+                raise ProviderBusyError(f"{len(self._waiters)} requests are already waiting for this provider")
+            self._waiters.append(waiter)
+            return False
+
+    def _withdraw(self, waiter: Any) -> bool:
+        """Remove a waiter that gives up, return False if it was handed a slot in the meantime"""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                return False
+            self.refused += 1
+            return True
+
+    def acquire(self) -> None:
+        """Wait for a slot in a thread"""
+        event = threading.Event()
+        if self._enqueue(event):
+            return
+        if not event.wait(self.timeout) and self._withdraw(event):
+            raise ProviderBusyError(f"No slot became free within {self.timeout} seconds")
+
+    async def aacquire(self) -> None:
+        """Wait for a slot without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        if self._enqueue(waiter):
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), self.timeout)
+        except asyncio.TimeoutError:
+            if self._withdraw(waiter):
+                raise ProviderBusyError(f"No slot became free within {self.timeout} seconds") from None
+        except asyncio.CancelledError:
+            if not self._withdraw(waiter):
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Hand the slot to the longest waiting request, or free it"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_grant, future)
+                    return
+                except RuntimeError: # The event loop of the waiter is closed
+                    continue
+            self.active -= 1
+
+# %% ../../nbs/10_policy.ipynb 10
+_limiters: Dict[Tuple, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(model_config: ModelConfig) -> Optional[ConcurrencyLimiter]:
+    """The process wide limiter of the provider endpoint of a model config, None when it has no limit"""
+    if model_config.max_concurrent_requests is None:
+        return None
+    key = (model_config.provider, model_config.api_base_url, model_config.max_concurrent_requests,
+           model_config.max_queued_requests, model_config.queue_timeout)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = ConcurrencyLimiter(model_config.max_concurrent_requests, model_config.max_queued_requests, model_config.queue_timeout)
+        return _limiters[key]
+
+# %% ../../nbs/10_policy.ipynb 13
+class PolicyClient:
+    """LLM client wrapper that applies the timeout, retry and concurrency policy of a model config"""
+
+    def __init__(self,
+            client: Any, # Client following LLMClientProtocol and AsyncLLMClientProtocol
+            model_config: ModelConfig
+            ):
+        """Wrap a client with the policy of its model config"""
+        self.client = client
+        self.model_config = model_config
+        self.limiter = get_limiter(model_config)
+        self.retries = 0
+        self._random = random.Random()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _delay(self, attempt: int, error: BaseException) -> float:
+        """Seconds to wait before retry `attempt + 1`"""
+        cap = self.model_config.retry_max_delay
+        delay = self._random.uniform(0, min(cap, self.model_config.retry_base_delay * 2 ** attempt))
+        retry_after = getattr(getattr(error, "response", None), "headers", {}).get("retry-after")
+        try:
+            delay = max(delay, min(cap, float(retry_after)))
+        except (TypeError, ValueError):
+            pass
+        self.retries += 1
+        return delay
+
+    def _give_up(self, attempt: int, error: BaseException) -> bool:
+        return attempt >= self.model_config.max_retries or not is_retryable(error)
+
+    @contextmanager
+    def _slot(self):
+        if self.limiter is None:
+            yield
+            return
+        self.limiter.acquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    @asynccontextmanager
+    async def _aslot(self):
+        if self.limiter is None:
+            yield
+            return
+        await self.limiter.aacquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    def chat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a completion, retrying temporary failures"""
+        for attempt in range(self.model_config.max_retries + 1):
+            try:
+                with self._slot():
+                    return self.client.chat_completion(messages, **kwargs)
+            except Exception as e:
+                if self._give_up(attempt, e):
+                    raise
+                time.sleep(self._delay(attempt, e))
+
+    def chat_completion_stream(self, messages: List[Message], **kwargs) -> Generator[str, None, None]:
+        """Stream a completion, retrying temporary failures before the first token"""
+        for attempt in range(self.model_config.max_retries + 1):
+            with self._slot():
+                stream = self.client.chat_completion_stream(messages, **kwargs)
+                try:
+                    first = next(stream)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    if self._give_up(attempt, e):
+                        raise
+                    error = e
+                else:
+                    try:
+                        yield first
+                        yield from stream
+                    finally:
+                        if hasattr(stream, "close"):
+                            stream.close()
+                    return
+            time.sleep(self._delay(attempt, error))
+
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a completion without blocking the event loop, retrying temporary failures"""
+        for attempt in range(self.model_config.max_retries + 1):
+            try:
+                async with self._aslot():
+                    return await self.client.achat_completion(messages, **kwargs)
+            except Exception as e:
+                if self._give_up(attempt, e):
+                    raise
+                await asyncio.sleep(self._delay(attempt, e))
+
+    async def _first(self, stream: AsyncIterator[str]) -> str:
+        """The first chunk of a stream, within the first token timeout"""
+        if self.model_config.first_token_timeout is None:
+            return await stream.__anext__()
+        try:
+            return await asyncio.wait_for(stream.__anext__(), self.model_config.first_token_timeout)
+        except asyncio.TimeoutError:
+            raise FirstTokenTimeout(f"No token within {self.model_config.first_token_timeout} seconds") from None
+
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Stream a completion without blocking the event loop, retrying temporary failures before the first token"""
+        for attempt in range(self.model_config.max_retries + 1):
+            async with self._aslot():
+                stream = self.client.achat_completion_stream(messages, **kwargs)
+                try:
+                    try:
+                        first = await self._first(stream)
+                    except StopAsyncIteration:
+                        return
+                    except Exception as e:
+                        if self._give_up(attempt, e):
+                            raise
+                        error = e
+                    else:
+                        yield first
+                        async for chunk in stream:
+                            yield chunk
+                        return
+                finally:
+                    if hasattr(stream, "aclose"):
+                        await stream.aclose()
+            await asyncio.sleep(self._delay(attempt, error))
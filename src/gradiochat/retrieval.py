@@ -0,0 +1,137 @@
+"""Chunk the context files, index them and retrieve only the parts that are relevant for the current user message."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/05_retrieval.ipynb.
+
+# %% auto 0
+__all__ = ['chunk_markdown', 'BM25Index', 'files_fingerprint', 'build_index']
+
+# %% ../../nbs/05_retrieval.ipynb 3
+from typing import List, Dict, Optional
+from collections import Counter
+from pathlib import Path
+import hashlib
+import json
+import math
+import re
+
+# %% ../../nbs/05_retrieval.ipynb 7
+def chunk_markdown(
+        text: str, # Markdown text to split
+        source: str = "", # Name of the file the text comes from
+        chunk_size: int = 1500 # Maximum number of characters per chunk
+        ) -> List[Dict[str, str]]:
+    """Split markdown text into chunks at headings and, for long sections, at paragraphs"""
+    chunks = []
+    for section in re.split(r"\n(?=#{1,6} )", text):
+        section = section.strip()
+        if not section:
+            continue
+        heading = section.splitlines()[0] if section.startswith("#") else ""
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", section):
+            # Split before the paragraph that doesn't fit, but never leave a heading on its own
+            if current.strip() not in ("", heading) and len(current) + len(paragraph) + 2 > chunk_size:
+                chunks.append(current)
+                current = heading + "\n\n" if heading and not paragraph.startswith("#") else ""
+            current += paragraph + "\n\n"
+        if current.strip():
+            chunks.append(current)
+    return [{"source": source, "text": chunk.strip()} for chunk in chunks]
+
+# %% ../../nbs/05_retrieval.ipynb 10
+def _tokenize(text: str) -> List[str]:
+    """Lowercase words of a text"""
+    return re.findall(r"\w+", text.lower())
+
+class BM25Index:
+    """Keyword search index over text chunks using the BM25 ranking function"""
+
+    def __init__(self,
+            chunks: List[Dict[str, str]], # Chunks as returned by `chunk_markdown`
+            k1: float = 1.5, # Term frequency saturation
+            b: float = 0.75 # Document length normalization
+            ):
+        """Build the index"""
+        self.chunks = chunks
+        self.k1, self.b = k1, b
+        self.doc_lengths = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        for i, chunk in enumerate(chunks):
+            terms = Counter(_tokenize(chunk["text"]))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, freq in terms.items():
+                self.postings.setdefault(term, {})[i] = freq
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0
+
+    def _idf(self, term: str) -> float:
+        """Inverse document frequency of a term"""
+        n = len(self.postings.get(term, {}))
+        return math.log(1 + (len(self.chunks) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, top_k: int = 4) -> List[Dict[str, str]]:
+        """Return the `top_k` chunks that best match the query, best match first"""
+        scores: Dict[int, float] = {}
+        for term in set(_tokenize(query)):
+            idf = self._idf(term)
+            for i, freq in self.postings.get(term, {}).items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [self.chunks[i] for i in best]
+
+    def save(self, path: Path, fingerprint: str = "") -> None:
+        """Write the chunks and the index to a JSON file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"fingerprint": fingerprint, "k1": self.k1, "b": self.b, "chunks": self.chunks,
+                "doc_lengths": self.doc_lengths, "postings": self.postings}
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: Optional[str] = None) -> Optional["BM25Index"]:
+        """Read an index written by `save`, or return None if it is missing or was built from other files"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if fingerprint is not None and data["fingerprint"] != fingerprint:
+            return None
+        index = cls.__new__(cls)
+        index.chunks, index.k1, index.b = data["chunks"], data["k1"], data["b"]
+        index.doc_lengths = data["doc_lengths"]
+        # JSON turns the chunk numbers into strings
+        index.postings = {term: {int(i): freq for i, freq in docs.items()} for term, docs in data["postings"].items()}
+        index.avg_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0
+        return index
+
+# %% ../../nbs/05_retrieval.ipynb 13
+def files_fingerprint(files: List[Path]) -> str:
+    """Fingerprint of a set of files based on their path, size and modification time"""
+    parts = []
+    for file_path in files:
+        file_path = Path(file_path)
+        if file_path.exists() and file_path.is_file():
+            stat = file_path.stat()
+            parts.append(f"{file_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def build_index(
+        files: List[Path], # Markdown files to index
+        chunk_size: int = 1500, # Maximum number of characters per chunk
+        index_path: Optional[Path] = None # Where to store the index, None keeps it in memory only
+        ) -> BM25Index:
+    """Build a BM25 index over the files, reusing the index stored at `index_path` if the files haven't changed"""
+    fingerprint = files_fingerprint(files) + f":{chunk_size}"
+    if index_path is not None:
+        index = BM25Index.load(index_path, fingerprint)
+        if index is not None:
+            return index
+    chunks = []
+    for file_path in files:
+        file_path = Path(file_path)
+        if file_path.exists() and file_path.is_file():
+            chunks += chunk_markdown(file_path.read_text(encoding="utf-8"), file_path.name, chunk_size)
+    index = BM25Index(chunks)
+    if index_path is not None:
+        index.save(index_path, fingerprint)
+    return index
@@ -0,0 +1,240 @@
+"""Spread requests over several model endpoints, with circuit breaking and failover."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/09_routing.ipynb.
+
+# %% auto 0
+__all__ = ['Endpoint', 'RoutingClient']
+
+# %% ../../nbs/09_routing.ipynb 3
+from typing import Generator, AsyncIterator, List, Dict, Optional, Any
+import random
+import threading
+import time
+
+from .config import Message, RoutingConfig
+
+# %% ../../nbs/09_routing.ipynb 6
+class Endpoint:
+    """Live state of one client of a RoutingClient"""
+
+    def __init__(self, client: Any):
+        """Initialize a healthy endpoint without requests"""
+        self.client = client
+        self.name = client.model_config.api_base_url or client.model_config.provider
+        self.outstanding = 0 # Requests in flight
+        self.latency: Optional[float] = None # Moving average of the seconds to the first token
+        self.failures = 0 # Consecutive failures
+        self.open_until: Optional[float] = None # Monotonic time until which the circuit is open
+        self.probing = False # Whether the trial request of a half-open circuit is in flight
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def state(self) -> str:
+        """State of the circuit breaker: closed, open or half_open"""
+        if self.open_until is None:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until or self.probing else "half_open"
+
+# %% ../../nbs/09_routing.ipynb 8
+class RoutingClient:
+    """LLM client that spreads requests over several endpoints, with circuit breaking and failover"""
+
+    def __init__(self,
+            clients: List[Any], # Clients following LLMClientProtocol and AsyncLLMClientProtocol, one per endpoint
+            routing: RoutingConfig
+            ):
+        """Initialize the endpoints and start the health checks if configured"""
+        if not clients:
+            raise ValueError("A RoutingClient needs at least one client")
+        self.endpoints = [Endpoint(client) for client in clients]
+        self.routing = routing
+        self.model_config = clients[0].model_config
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._stop = threading.Event()
+        if routing.health_check_interval is not None:
+            threading.Thread(target=self._health_loop, daemon=True).start()
+
+    def _order(self, endpoints: List[Endpoint]) -> List[Endpoint]:
+        """Order endpoints with a closed or half-open circuit by preference"""
+        if self.routing.strategy == "least_outstanding":
+            return sorted(endpoints, key=lambda e: e.outstanding)
+        known = [e.latency for e in endpoints if e.latency is not None]
+        fastest = min(known) if known else 1.0 # Endpoints without measurements count as the fastest
+        pool, order = list(endpoints), []
+        while pool:
+            weights = [1 / ((e.latency or fastest) * (e.outstanding + 1)) for e in pool]
+            chosen = self._random.choices(pool, weights)[0]
+            order.append(chosen)
+            pool.remove(chosen)
+        return order
+
+    def candidates(self) -> List[Endpoint]:
+        """The endpoints to try for a request, in order"""
+        with self._lock:
+            available = [e for e in self.endpoints if e.state != "open"]
+            unavailable = sorted((e for e in self.endpoints if e.state == "open"), key=lambda e: e.open_until)
+            return self._order(available) + unavailable
+
+    def _begin(self, endpoint: Endpoint) -> bool:
+        """Count a request to the endpoint, return whether it is the trial request of a half-open circuit"""
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            if endpoint.state == "half_open":
+                endpoint.probing = True
+                return True
+            return False
+
+    def _succeeded(self, endpoint: Endpoint, seconds: float) -> None:
+        """Record a first token, or a complete answer, after `seconds`"""
+        with self._lock:
+            endpoint.latency = seconds if endpoint.latency is None else 0.7 * endpoint.latency + 0.3 * seconds
+            endpoint.failures, endpoint.open_until, endpoint.probing = 0, None, False
+
+    def _failed(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if endpoint.failures >= self.routing.failure_threshold or endpoint.open_until is not None:
+                endpoint.open_until = time.monotonic() + self.routing.recovery_time
+            endpoint.probing = False
+
+    def _end(self, endpoint: Endpoint, probe: bool) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            # A trial request that was cancelled or stopped before its first token neither closed nor reopened the circuit
+            if probe:
+                endpoint.probing = False
+
+    def chat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a completion on the first endpoint that answers"""
+        error = None
+        for endpoint in self.candidates():
+            probe = self._begin(endpoint)
+            start = time.monotonic()
+            try:
+                response = endpoint.client.chat_completion(messages, **kwargs)
+            except Exception as e:
+                self._failed(endpoint)
+                error = e
+                continue
+            finally:
+                self._end(endpoint, probe)
+            self._succeeded(endpoint, time.monotonic() - start)
+            return response
+        raise error
+
+    def chat_completion_stream(self, messages: List[Message], **kwargs) -> Generator[str, None, None]:
+        """Stream a completion from the first endpoint that produces a token"""
+        error = None
+        for endpoint in self.candidates():
+            probe = self._begin(endpoint)
+            start = time.monotonic()
+            try:
+                stream = endpoint.client.chat_completion_stream(messages, **kwargs)
+                try:
+                    first = next(stream)
+                except StopIteration:
+                    self._succeeded(endpoint, time.monotonic() - start)
+                    return
+                except Exception as e:
+                    self._failed(endpoint)
+                    error = e
+                    continue
+                self._succeeded(endpoint, time.monotonic() - start)
+                try:
+                    yield first
+                    yield from stream
+                except Exception:
+                    self._failed(endpoint)
+                    raise
+                finally:
+                    if hasattr(stream, "close"):
+                        stream.close()
+                return
+            finally:
+                self._end(endpoint, probe)
+        raise error
+
+    async def achat_completion(self, messages: List[Message], **kwargs) -> str:
+        """Generate a completion on the first endpoint that answers, without blocking the event loop"""
+        error = None
+        for endpoint in self.candidates():
+            probe = self._begin(endpoint)
+            start = time.monotonic()
+            try:
+                response = await endpoint.client.achat_completion(messages, **kwargs)
+            except Exception as e:
+                self._failed(endpoint)
+                error = e
+                continue
+            finally:
+                self._end(endpoint, probe)
+            self._succeeded(endpoint, time.monotonic() - start)
+            return response
+        raise error
+
+    async def achat_completion_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        """Stream a completion from the first endpoint that produces a token, without blocking the event loop"""
+        error = None
+        for endpoint in self.candidates():
+            probe = self._begin(endpoint)
+            start = time.monotonic()
+            stream = endpoint.client.achat_completion_stream(messages, **kwargs)
+            try:
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    self._succeeded(endpoint, time.monotonic() - start)
+                    return
+                except Exception as e:
+                    self._failed(endpoint)
+                    error = e
+                    continue
+                self._succeeded(endpoint, time.monotonic() - start)
+                yield first
+                try:
+                    async for chunk in stream:
+                        yield chunk
+                except Exception:
+                    self._failed(endpoint)
+                    raise
+                return
+            finally:
+                if hasattr(stream, "aclose"):
+                    await stream.aclose()
+                self._end(endpoint, probe)
+        raise error
+
+    def check_health(self) -> None:
+        """Run the health check of every endpoint once, opening the circuit of failing endpoints and closing it for healthy ones"""
+        for endpoint in self.endpoints:
+            check = getattr(endpoint.client, "health_check", None)
+            if check is None:
+                continue
+            try:
+                check()
+            except Exception:
+                with self._lock:
+                    endpoint.failures = max(endpoint.failures, self.routing.failure_threshold)
+                    endpoint.open_until = time.monotonic() + self.routing.recovery_time
+            else:
+                with self._lock:
+                    if not endpoint.probing:
+                        endpoint.failures, endpoint.open_until = 0, None
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.routing.health_check_interval):
+            self.check_health()
+
+    def close(self) -> None:
+        """Stop the health checks"""
+        self._stop.set()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """The state of every endpoint"""
+        with self._lock:
+            return [dict(name=e.name, state=e.state, outstanding=e.outstanding, latency=e.latency,
+                         requests=e.requests, errors=e.errors) for e in self.endpoints]
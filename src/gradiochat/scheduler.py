@@ -0,0 +1,266 @@
+"""Fair queuing between users and token rate limits per session and IP address for the generation requests of a chat app."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/16_scheduler.ipynb.
+
+# %% auto 0
+__all__ = ['RateLimitExceeded', 'TokenBucket', 'Ticket', 'FairScheduler']
+
+# %% ../../nbs/16_scheduler.ipynb 3
+from typing import List, Dict, Optional, Tuple
+from contextlib import contextmanager, asynccontextmanager
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from .config import SchedulerConfig
+from .policy import ProviderBusyError
+
+# %% ../../nbs/16_scheduler.ipynb 6
+class RateLimitExceeded(RuntimeError):
+    """Raised when the session or IP address of a request went over its token rate"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after # Seconds until the request would be allowed
+
+
+class TokenBucket:
+    """Bucket of tokens that refills at a constant rate up to its capacity"""
+
+    def __init__(self,
+            rate: float, # Tokens added per second
+            capacity: float # Maximum number of tokens in the bucket, the largest burst
+            ):
+        """Initialize a full bucket"""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until `amount` tokens can be taken, 0 when they can be taken now"""
+        self._refill(time.monotonic() if now is None else now)
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Take tokens, going into debt when the bucket holds fewer"""
+        self.tokens -= amount
+
+    def put(self, amount: float) -> None:
+        """Return tokens that were taken but not used"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+# %% ../../nbs/16_scheduler.ipynb 9
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Ticket:
+    """Place of a request in a `FairScheduler`, from `submit` until `release`"""
+
+    def __init__(self,
+            flow: str, # Session the request is queued fairly with
+            cost: float, # Tokens charged to the rate limits and the fair queue
+            weight: float, # Share of the session relative to the other sessions
+            buckets: List[TokenBucket], # Token buckets the cost was taken from
+            seq: int, # Order of submission, breaks ties between equal finish times
+            loop: Optional[asyncio.AbstractEventLoop] = None # Event loop that waits for the ticket, None for a thread
+            ):
+        """Initialize a ticket that waits for a slot"""
+        self.flow = flow
+        self.cost = cost
+        self.weight = weight
+        self.used: Optional[float] = None # Tokens the request used, set before `release` to refund the rest
+        self.start = 0.0 # Virtual start time in the fair queue
+        self.finish = 0.0 # Virtual finish time in the fair queue
+        self.granted = False
+        self.released = False
+        self._buckets = buckets
+        self._seq = seq
+        self._event = threading.Event()
+        self._loop = loop
+        self._future = loop.create_future() if loop is not None else None
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (self.finish, self._seq) < (other.finish, other._seq)
+
+    def _grant(self) -> None:
+        """Wake up the waiter, raises RuntimeError when its event loop is closed"""
+        self.granted = True
+        self._event.set()
+        if self._future is not None:
+            self._loop.call_soon_threadsafe(_grant, self._future)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait in a thread until the request may run, return whether it may"""
+        return self._event.wait(timeout)
+
+    async def async_wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait on the event loop of the ticket until the request may run, return whether it may"""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.granted
+
+
+_MAX_ENTRIES = 10000 # Idle buckets and sessions are forgotten when there are more
+
+class FairScheduler:
+    """Weighted fair queue with token rate limits per session and IP address, for threads and event loops"""
+
+    def __init__(self, config: SchedulerConfig):
+        """Initialize a scheduler without requests"""
+        self.config = config
+        self.active = 0
+        self.refused = 0 # Requests refused because the queue was full or they waited too long
+        self.rate_limited = 0 # Requests refused because their session or IP address went over its rate
+        self._queue: List[Ticket] = [] # Heap of the waiting tickets, by virtual finish time
+        self._finish: Dict[str, float] = {} # Session -> virtual finish time of its last request
+        self._virtual_time = 0.0
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot"""
+        return len(self._queue)
+
+    def _bucket(self, kind: str, key: Optional[str], tokens_per_minute: Optional[int], now: float) -> Optional[TokenBucket]:
+        """The token bucket of a session or IP address, None without a limit"""
+        if tokens_per_minute is None or not key:
+            return None
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            if len(self._buckets) >= _MAX_ENTRIES:
+                # A full bucket is the same as a new one, so those can go
+                self._buckets = {k: b for k, b in self._buckets.items() if b.wait_time(b.capacity, now) > 0}
+            bucket = self._buckets[(kind, key)] = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        return bucket
+
+    def submit(self,
+            session: Optional[str], # Session of the request, the unit of fairness
+            ip: Optional[str], # IP address of the client
+            cost: float, # Estimated prompt plus completion tokens
+            weight: float = 1.0, # Share of the session, a session with weight 2 gets twice the tokens of one with weight 1
+            loop: Optional[asyncio.AbstractEventLoop] = None # Event loop that waits for the ticket, None for a thread
+            ) -> Ticket:
+        """Charge a request to its rate limits and give it a free slot or a place in the queue"""
+        with self._lock:
+            now = time.monotonic()
+            buckets = [b for b in (self._bucket("session", session, self.config.session_tokens_per_minute, now),
+                                   self._bucket("ip", ip, self.config.ip_tokens_per_minute, now)) if b is not None]
+            wait = max((b.wait_time(cost, now) for b in buckets), default=0.0)
+            if wait > 0:
+                self.rate_limited += 1
+                raise RateLimitExceeded(f"Token rate exceeded, retry in {wait:.1f} seconds", wait)
+            free = self.active < self.config.max_concurrent and not self._queue
+            if not free and len(self._queue) >= self.config.max_queued:
+                self.refused += 1
+                raise ProviderBusyError(f"{len(self._queue)} requests are already waiting in the queue")
+            for bucket in buckets:
+                bucket.take(cost)
+            flow = session or ip or ""
+            ticket = Ticket(flow, cost, weight, buckets, next(self._seq), loop)
+            ticket.start = max(self._virtual_time, self._finish.get(flow, 0.0))
+            ticket.finish = ticket.start + cost / weight
+            self._finish[flow] = ticket.finish
+            if free:
+                self.active += 1
+                self._start(ticket)
+            else:
+                heapq.heappush(self._queue, ticket)
+            return ticket
+
+    def _start(self, ticket: Ticket) -> bool:
+        """Give a slot to a ticket, return False when nobody waits for it anymore"""
+        try:
+            ticket._grant()
+        except RuntimeError: # The event loop of the waiter is closed
+            ticket.released = True
+            return False
+        self._virtual_time = max(self._virtual_time, ticket.start)
+        if len(self._finish) > _MAX_ENTRIES:
+            # Sessions that finished before the virtual time start from it anyway
+            self._finish = {flow: finish for flow, finish in self._finish.items() if finish > self._virtual_time}
+        return True
+
+    def position(self, ticket: Ticket) -> int:
+        """Place of a waiting ticket in the queue starting at 1, 0 when it has a slot or was released"""
+        with self._lock:
+            if ticket.granted or ticket.released:
+                return 0
+            return 1 + sum(1 for other in self._queue if other < ticket)
+
+    def release(self, ticket: Ticket) -> None:
+        """End a request that ran or gave up waiting, refund the tokens it didn't use and hand on its slot"""
+        with self._lock:
+            self._release(ticket)
+
+    def _release(self, ticket: Ticket) -> None:
+        """Release a ticket while holding the lock"""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.granted:
+            used = ticket.cost if ticket.used is None else min(ticket.used, ticket.cost)
+        else:
+            used = 0
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        unused = ticket.cost - used
+        for bucket in ticket._buckets:
+            bucket.put(unused)
+        # The next request of the session starts where this one really finished
+        if self._finish.get(ticket.flow) == ticket.finish:
+            self._finish[ticket.flow] = ticket.finish - unused / ticket.weight
+        if ticket.granted:
+            while self._queue:
+                if self._start(heapq.heappop(self._queue)):
+                    return
+            self.active -= 1
+
+    def expire(self, ticket: Ticket) -> Optional[ProviderBusyError]:
+        """Release a ticket that waited longer than the queue timeout and return the error to raise, None when it got a slot after all"""
+        with self._lock:
+            # Another request may have handed on its slot between the end of the wait and now
+            if ticket.granted:
+                return None
+            self.refused += 1
+            self._release(ticket)
+        return ProviderBusyError(f"No slot became free within {self.config.queue_timeout} seconds")
+
+    @contextmanager
+    def slot(self, session: Optional[str], ip: Optional[str], cost: float, weight: float = 1.0):
+        """Hold a slot in a thread while the block runs, the block may set `used` of the ticket it gets"""
+        ticket = self.submit(session, ip, cost, weight)
+        try:
+            if not ticket.wait(self.config.queue_timeout):
+                error = self.expire(ticket)
+                if error is not None:
+                    raise error
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, session: Optional[str], ip: Optional[str], cost: float, weight: float = 1.0):
+        """Hold a slot without blocking the event loop while the block runs"""
+        ticket = self.submit(session, ip, cost, weight, loop=asyncio.get_running_loop())
+        try:
+            if not await ticket.async_wait(self.config.queue_timeout):
+                error = self.expire(ticket)
+                if error is not None:
+                    raise error
+            yield ticket
+        finally:
+            self.release(ticket)
@@ -0,0 +1,66 @@
+"""Count tokens and fit the conversation history into the context window of the model."""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/04_tokens.ipynb.
+
+# %% auto 0
+__all__ = ['TokenCounter', 'fit_history']
+
+# %% ../../nbs/04_tokens.ipynb 3
+from typing import List, Dict
+from functools import lru_cache
+import importlib.util
+
+# %% ../../nbs/04_tokens.ipynb 6
+class TokenCounter:
+    """Count tokens of chat messages, caching the count per message text"""
+
+    # Tokens the chat template adds around every message (role, separators)
+    message_overhead = 4
+    # Average number of characters per token, used when no tokenizer is available
+    chars_per_token = 3.5
+
+    def __init__(self,
+            encoding: str = "cl100k_base", # tiktoken encoding, ignored when tiktoken is not installed
+            cache_size: int = 10000 # Number of message texts to keep the count of
+            ):
+        """Initialize the counter with tiktoken if available, or a character based estimate"""
+        self.encoding = None
+        if importlib.util.find_spec("tiktoken") is not None:
+            import tiktoken
+            self.encoding = tiktoken.get_encoding(encoding)
+        self._count = lru_cache(maxsize=cache_size)(self._count_uncached)
+
+    def _count_uncached(self, text: str) -> int:
+        """Count the tokens in a text"""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return int(len(text) / self.chars_per_token) + 1
+
+    def count(self, text: str) -> int:
+        """Count the tokens in a text, using the cache"""
+        return self._count(text)
+
+    def count_message(self, content: str) -> int:
+        """Count the tokens of a chat message including the template overhead"""
+        return self.count(content) + self.message_overhead
+
+# %% ../../nbs/04_tokens.ipynb 9
+def fit_history(
+        counter: TokenCounter,
+        system_content: str, # Content of the system message, always kept
+        chat_history: List[Dict[str, str]], # Previous messages in the Gradio messages format, oldest first
+        user_message: str, # The latest user message, always kept
+        budget: int # Maximum number of prompt tokens
+        ) -> List[Dict[str, str]]:
+    """Return the most recent part of the history that fits in the budget together with the system and user message"""
+    remaining = budget - counter.count_message(system_content) - counter.count_message(user_message)
+    start = len(chat_history)
+    for i in range(len(chat_history) - 1, -1, -1):
+        remaining -= counter.count_message(chat_history[i]['content'])
+        if remaining < 0:
+            break
+        start = i
+    # Don't start the history with an answer to a question that was dropped
+    while 0 < start < len(chat_history) and chat_history[start]['role'] == "assistant":
+        start += 1
+    return chat_history[start:]
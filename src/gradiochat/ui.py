@@ -3,64 +3,403 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/02_ui.ipynb.
 
 # %% auto 0
-__all__ = ['GradioChat', 'create_chat_app']
+__all__ = ['StreamFrames', 'GradioChat', 'create_chat_app']
 
 # %% ../../nbs/02_ui.ipynb 3
 import gradio as gr
+import asyncio
+import threading
 import tempfile
 import datetime
+import math
 import os
-from typing import List, Tuple, Dict, Generator
+import time
+import uuid
+from contextlib import contextmanager, asynccontextmanager, closing, aclosing
+from typing import List, Tuple, Dict, Set, Generator, AsyncIterator, Optional
 from fastcore.basics import patch
 from .config import ChatAppConfig, ModelConfig
 from .app import BaseChatApp
+from .metrics import mount_metrics
+from .policy import ProviderBusyError, ConcurrencyLimiter, is_retryable
+from .scheduler import Ticket, RateLimitExceeded
 from pathlib import Path
 
-# %% ../../nbs/02_ui.ipynb 6
+# %% ../../nbs/02_ui.ipynb 7
+class StreamFrames:
+    """Collects streamed text chunks into frames, so the UI is updated on a time or size budget instead of for every token"""
+
+    def __init__(self,
+            interval: float = 0.04, # Seconds between frames
+            max_chars: int = 2048 # Start a frame early once this many characters are waiting
+            ):
+        """Initialize an empty buffer"""
+        self.interval = interval
+        self.max_chars = max_chars
+        self.text = "" # Text of all frames so far
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._last_frame: Optional[float] = None
+
+    def add(self, chunk: str) -> bool:
+        """Add a chunk, return whether a frame is due. If so, `text` includes all chunks so far"""
+        self._pending.append(chunk)
+        self._pending_chars += len(chunk)
+        now = time.monotonic()
+        if self._last_frame is None or now - self._last_frame >= self.interval or self._pending_chars >= self.max_chars:
+            self._last_frame = now
+            return self.flush()
+        return False
+
+    @property
+    def received(self) -> str:
+        """Text of all chunks so far, including the ones waiting for the next frame"""
+        return self.text + "".join(self._pending)
+
+    def flush(self) -> bool:
+        """Move the waiting chunks into `text`, return whether there were any"""
+        if not self._pending:
+            return False
+        self.text += "".join(self._pending)
+        self._pending.clear()
+        self._pending_chars = 0
+        return True
+
+# %% ../../nbs/02_ui.ipynb 10
+class _Generation:
+    """A running generation of a session, which can be stopped from another request"""
+
+    def __init__(self,
+            task: Optional[asyncio.Task] = None # Task of a generation on the event loop, None for one in a worker thread
+            ):
+        """Register a generation that hasn't been stopped"""
+        self.task = task
+        self.stopped = threading.Event()
+        self.discard = False # Whether the part of the answer generated so far should be dropped
+
+    def stop(self, discard: bool = False) -> None:
+        """Cancel the task of the generation, or tell a generation in a worker thread to stop at its next chunk"""
+        self.discard = self.discard or discard
+        self.stopped.set()
+        if self.task is not None and not self.task.done():
+            self.task.get_loop().call_soon_threadsafe(self.task.cancel)
+
+# %% ../../nbs/02_ui.ipynb 11
 class GradioChat:
     """Gradio interface for the chat application"""
     
-    def __init__(self, app: BaseChatApp):
+    def __init__(self,
+            app: BaseChatApp,
+            limiter: Optional[ConcurrencyLimiter] = None # Worker budget shared with other chats, see the `host` module
+            ):
         """Initialize with a configured BaseChatApp"""
         self.app = app
+        self.limiter = limiter
         self.interface = None
+        self._conversation_ids: Dict[str, str] = {} # Gradio session -> id of its conversation in the conversation log
+        self._generations: Dict[str, Set[_Generation]] = {} # Gradio session -> its running generations
+        self._generations_lock = threading.Lock()
     
-    def respond(self, message: str, chat_history: List[Dict[str, str]]) -> Tuple[str, List[Tuple[str, str]]]:
+    def respond(self, message: str, chat_history: List[Dict[str, str]], request: gr.Request = None) -> Tuple[str, List[Dict[str, str]]]:
         """Generate a response to the user message and update chat history"""
-        # Store the current chat history in the app
-        self.app.chat_history = chat_history
+        # Work on a copy, the history belongs to the session of this request only
+        chat_history = list(chat_history or [])
         
-        # Generate response
-        response = self.app.generate_response(message)
+        # Generate response, after waiting for a turn when the app has a scheduler
+        ticket, completion_tokens = None, 0
+        try:
+            ticket = self._schedule(message, chat_history, request)
+            for _ in self._wait_turn(ticket):
+                pass
+            with self._slot():
+                response = self.app.generate_response(message, chat_history)
+            completion_tokens = self.app.token_counter.count(response)
+        except Exception as e:
+            raise self._friendly_error(e) from e
+        finally:
+            self._release(ticket, completion_tokens)
         
         # Update chat history
         chat_history.append({"role": "user", "content": message})
         chat_history.append({"role": "assistant", "content": response})
+        self._log_turn(request, chat_history)
         
         # Return empty message (to clear input) and updated history
         return "", chat_history
     
-    def respond_stream(self, message: str, chat_history: List[Tuple[str, str]]) -> Generator[Tuple[str, List[Tuple[str, str]]], None, None]:
+    def respond_stream(self, message: str, chat_history: List[Dict[str, str]], request: gr.Request = None) -> Generator[Tuple[str, List[Dict[str, str]]], None, None]:
         """Generate a streaming response to the user message"""
-        # Store the current chat history in the app
-        self.app.chat_history = chat_history
+        # Work on a copy, the history belongs to the session of this request only
+        history = list(chat_history or [])
+        
+        # Add the user message to the history, the assistant message is appended empty before the request is scheduled and shows the place in the queue until the first frame
+        chat_history = history + [{"role": "user", "content": message}]
+        
+        # Show the user message right away, before the first token arrives
+        yield "", chat_history
+        
+        # Stream the response, updating the last assistant message in place once per frame
+        frames = StreamFrames(self.app.config.stream_frame_interval, self.app.config.stream_frame_chars)
+        assistant = {"role": "assistant", "content": ""}
+        chat_history.append(assistant)
+        generation = self._begin_generation(request)
+        ticket = None
+        try:
+            # Show the place in the queue while waiting for a turn
+            ticket = self._schedule(message, history, request)
+            for position in self._wait_turn(ticket):
+                if generation.stopped.is_set():
+                    return
+                assistant["content"] = self.app.config.scheduler.queue_message.format(position=position)
+                yield "", chat_history
+            with self._slot(), closing(self.app.generate_stream(message, history)) as stream:
+                for text_chunk in stream:
+                    # Stop reading when the user stopped the generation, closing the stream ends it at the provider
+                    if generation.stopped.is_set():
+                        break
+                    if frames.add(text_chunk):
+                        assistant["content"] = frames.text
+                        yield "", chat_history
+        except Exception as e:
+            raise self._friendly_error(e) from e
+        except BaseException:
+            # Gradio closed the generator, keep the part of the answer that was generated
+            self._store_partial(request, chat_history, frames, generation)
+            raise
+        finally:
+            self._release(ticket, self.app.token_counter.count(frames.received))
+            self._end_generation(request, generation)
+        
+        if generation.stopped.is_set():
+            self._store_partial(request, chat_history, frames, generation)
+            return
         
-        # Add user message to history with empty assistant response
+        if frames.flush():
+            assistant["content"] = frames.text
+            yield "", chat_history
+        
+        self._log_turn(request, chat_history)
+    
+    async def arespond(self, message: str, chat_history: List[Dict[str, str]], request: gr.Request = None) -> Tuple[str, List[Dict[str, str]]]:
+        """Generate a response to the user message on the event loop and update chat history"""
+        chat_history = list(chat_history or [])
+        generation = self._begin_generation(request, asyncio.current_task())
+        ticket, completion_tokens = None, 0
+        try:
+            ticket = self._schedule(message, chat_history, request, asyncio.get_running_loop())
+            async for _ in self._await_turn(ticket):
+                pass
+            async with self._aslot():
+                response = await self.app.agenerate_response(message, chat_history)
+            completion_tokens = self.app.token_counter.count(response)
+        except Exception as e:
+            raise self._friendly_error(e) from e
+        finally:
+            self._release(ticket, completion_tokens)
+            self._end_generation(request, generation)
         chat_history.append({"role": "user", "content": message})
+        chat_history.append({"role": "assistant", "content": response})
+        self._log_turn(request, chat_history)
+        return "", chat_history
+    
+    async def arespond_stream(self, message: str, chat_history: List[Dict[str, str]], request: gr.Request = None) -> AsyncIterator[Tuple[str, List[Dict[str, str]]]]:
+        """Generate a streaming response to the user message on the event loop"""
+        history = list(chat_history or [])
+        chat_history = history + [{"role": "user", "content": message}]
+        yield "", chat_history
         
-        # Stream the response
-        accumulated_text = ""
-        for text_chunk in self.app.generate_stream(message):
-            accumulated_text += text_chunk
-            
-            # Update the last assistant message
-            updated_history = chat_history.copy()
-            updated_history.append({"role": "assistant", "content": accumulated_text})
-            
-            # Yield empty message and updated history
-            yield "", updated_history
+        frames = StreamFrames(self.app.config.stream_frame_interval, self.app.config.stream_frame_chars)
+        assistant = {"role": "assistant", "content": ""}
+        chat_history.append(assistant)
+        generation = self._begin_generation(request, asyncio.current_task())
+        ticket = None
+        try:
+            ticket = self._schedule(message, history, request, asyncio.get_running_loop())
+            async for position in self._await_turn(ticket):
+                assistant["content"] = self.app.config.scheduler.queue_message.format(position=position)
+                yield "", chat_history
+            async with self._aslot(), aclosing(self.app.agenerate_stream(message, history)) as stream:
+                async for text_chunk in stream:
+                    if frames.add(text_chunk):
+                        assistant["content"] = frames.text
+                        yield "", chat_history
+        except Exception as e:
+            raise self._friendly_error(e) from e
+        except BaseException:
+            # Stopped, or the browser went away: keep the part of the answer that was generated
+            self._store_partial(request, chat_history, frames, generation)
+            raise
+        finally:
+            self._release(ticket, self.app.token_counter.count(frames.received))
+            self._end_generation(request, generation)
+        
+        if frames.flush():
+            assistant["content"] = frames.text
+            yield "", chat_history
+        
+        self._log_turn(request, chat_history)
+    
+    def _schedule(self, message: str, history: List[Dict[str, str]], request: Optional[gr.Request], loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[Ticket]:
+        """Charge the request to the app's scheduler and return its ticket, None when the app has no scheduler"""
+        if self.app.scheduler is None:
+            return None
+        prompt_tokens, completion_tokens = self.app.estimate_tokens(message, history)
+        session = request.session_hash if request is not None else None
+        ip = getattr(getattr(request, "client", None), "host", None)
+        ticket = self.app.scheduler.submit(session, ip, prompt_tokens + completion_tokens, loop=loop)
+        ticket.used = prompt_tokens
+        return ticket
+    
+    def _wait_turn(self, ticket: Optional[Ticket]) -> Generator[int, None, None]:
+        """Wait in a thread until a scheduled request may run, yielding its place in the queue when it changes"""
+        if ticket is None:
+            return
+        timeout, last = self.app.scheduler.config.queue_timeout, None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while position := self.app.scheduler.position(ticket):
+            if deadline is not None and time.monotonic() >= deadline:
+                error = self.app.scheduler.expire(ticket)
+                if error is not None:
+                    raise error
+                break
+            if position != last:
+                last = position
+                yield position
+            ticket.wait(1.0)
+    
+    async def _await_turn(self, ticket: Optional[Ticket]) -> AsyncIterator[int]:
+        """Wait on the event loop until a scheduled request may run, yielding its place in the queue when it changes"""
+        if ticket is None:
+            return
+        timeout, last = self.app.scheduler.config.queue_timeout, None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while position := self.app.scheduler.position(ticket):
+            if deadline is not None and time.monotonic() >= deadline:
+                error = self.app.scheduler.expire(ticket)
+                if error is not None:
+                    raise error
+                break
+            if position != last:
+                last = position
+                yield position
+            await ticket.async_wait(1.0)
+    
+    def _release(self, ticket: Optional[Ticket], completion_tokens: int) -> None:
+        """Release a scheduled request, charging it the prompt and the completion tokens it used"""
+        if ticket is not None:
+            ticket.used += completion_tokens
+            self.app.scheduler.release(ticket)
+    
+    @contextmanager
+    def _slot(self):
+        """Hold a slot of the shared worker budget while generating, if the chat has one"""
+        if self.limiter is None:
+            yield
+            return
+        self.limiter.acquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+    
+    @asynccontextmanager
+    async def _aslot(self):
+        """Hold a slot of the shared worker budget without blocking the event loop, if the chat has one"""
+        if self.limiter is None:
+            yield
+            return
+        await self.limiter.aacquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+    
+    def _friendly_error(self, error: Exception) -> Exception:
+        """The busy or rate limit message as a Gradio error when the provider is overloaded, keeps failing or the user sends too much, otherwise the error itself"""
+        if isinstance(error, RateLimitExceeded):
+            return gr.Error(self.app.config.scheduler.rate_limit_message.format(seconds=math.ceil(error.retry_after)))
+        if isinstance(error, ProviderBusyError) or is_retryable(error):
+            return gr.Error(self.app.config.busy_message)
+        return error
+    
+    def _begin_generation(self, request: Optional[gr.Request], task: Optional[asyncio.Task] = None) -> _Generation:
+        """Register a generation for the session that made the request, so it can be stopped"""
+        generation = _Generation(task)
+        if request is not None and request.session_hash:
+            with self._generations_lock:
+                self._generations.setdefault(request.session_hash, set()).add(generation)
+        return generation
+    
+    def _end_generation(self, request: Optional[gr.Request], generation: _Generation) -> None:
+        """Forget a generation that finished, failed or was stopped"""
+        if request is not None and request.session_hash:
+            with self._generations_lock:
+                generations = self._generations.get(request.session_hash, set())
+                generations.discard(generation)
+                if not generations:
+                    self._generations.pop(request.session_hash, None)
+    
+    def stop_generation(self, request: gr.Request = None) -> None:
+        """Stop the generations that are running for the session that made the request"""
+        self._stop_generations(request)
+    
+    def _stop_generations(self, request: Optional[gr.Request], discard: bool = False) -> None:
+        """Stop the generations of a session, dropping their partial answers if `discard`"""
+        if request is not None and request.session_hash:
+            with self._generations_lock:
+                generations = list(self._generations.get(request.session_hash, ()))
+            for generation in generations:
+                generation.stop(discard)
+    
+    def _store_partial(self, request: Optional[gr.Request], chat_history: List[Dict[str, str]], frames: StreamFrames, generation: _Generation) -> None:
+        """Keep a stopped answer with the chunks that arrived before it was stopped, unless the chat was cleared"""
+        frames.flush()
+        if frames.text and not generation.discard:
+            chat_history[-1]["content"] = frames.text
+            self._log_turn(request, chat_history)
+    
+    def _log_turn(self, request: Optional[gr.Request], chat_history: List[Dict[str, str]]) -> None:
+        """Log the last turn of the conversation of the session that made the request"""
+        if request is not None and request.session_hash:
+            conversation_id = self._conversation_ids.get(request.session_hash, request.session_hash)
+            self.app.log_turn(conversation_id, chat_history[-2]["content"], chat_history[-1]["content"])
+    
+    def clear_session(self, request: gr.Request = None) -> None:
+        """Stop the generation of the session that made the request and drop its partial answer"""
+        self._stop_generations(request, discard=True)
+    
+    def resume_conversation(self, conversation_id: Optional[str], request: gr.Request = None) -> Tuple[List[Dict[str, str]], str]:
+        """Continue the logged conversation of the browser, or start a new one, and return its history and id"""
+        history = []
+        if conversation_id and self.app.config.conversation_log.resume:
+            history = self.app.conversation_log.conversation(conversation_id)
+        else:
+            conversation_id = uuid.uuid4().hex
+        if request is not None and request.session_hash:
+            self._conversation_ids[request.session_hash] = conversation_id
+        if not history and self.app.config.starter_prompt:
+            history = [{"role": "assistant", "content": self.app.config.starter_prompt}]
+        return history, conversation_id
+    
+    def new_conversation(self, request: gr.Request = None) -> str:
+        """Log the next turns of the session that made the request under a new conversation id, and return it"""
+        conversation_id = uuid.uuid4().hex
+        if request is not None and request.session_hash:
+            self._conversation_ids[request.session_hash] = conversation_id
+        return conversation_id
+    
+    def export_history(self, conversation_id: Optional[str], chat_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """The conversation to export: the logged one when the browser has a conversation id, otherwise the chat history of the browser"""
+        if conversation_id:
+            return self.app.conversation_log.conversation(conversation_id)
+        return chat_history or []
+    
+    def forget_conversation(self, request: gr.Request = None) -> None:
+        """Drop the conversation id of a session that was closed, its turns stay in the log"""
+        if request is not None and request.session_hash:
+            self._conversation_ids.pop(request.session_hash, None)
 
-# %% ../../nbs/02_ui.ipynb 9
+# %% ../../nbs/02_ui.ipynb 14
 from datetime import datetime
 
 
@@ -68,6 +407,12 @@ from datetime import datetime
 def build_interface(self:GradioChat) -> gr.Blocks:
     """Build and return the Gradio interface"""
     with gr.Blocks(theme=self.app.config.theme) as interface:
+        # With a conversation log the browser keeps the id of its conversation, so it can be resumed after a reload
+        log_config = self.app.config.conversation_log
+        if log_config is not None:
+            secret = os.environ.get(log_config.secret_env_var) if log_config.secret_env_var else None
+            conversation_id = gr.BrowserState(None, storage_key=f"gradiochat-{self.app.config.app_name}", secret=secret)
+        
         with gr.Row():
             # Left column for logo
             with gr.Column(scale=1):
@@ -110,6 +455,7 @@ def build_interface(self:GradioChat) -> gr.Blocks:
         # Buttons
         with gr.Row():
             submit_btn = gr.Button("Send", variant="primary")
+            stop_btn = gr.Button("Stop", variant="stop")
             clear_btn = gr.ClearButton([msg, chatbot], value="Clear chat")
 
         # Export functionality
@@ -133,18 +479,29 @@ def build_interface(self:GradioChat) -> gr.Blocks:
             if self.app.config.show_context and hasattr(self.app, 'context_text') and self.app.context_text:
                 gr.Markdown(f"### Additional Context\n{self.app.context_text}")
         
-        # Set up event handlers
-        submit_btn.click(
-            self.respond,
+        # Set up event handlers, streaming tokens to the browser as they arrive if enabled
+        respond_fn = self.arespond_stream if self.app.config.model.stream else self.arespond
+        click_event = submit_btn.click(
+            respond_fn,
             inputs=[msg, chatbot],
             outputs=[msg, chatbot]
         )
         
-        msg.submit(
-            self.respond,
+        # Sending a new message stops the answer to the previous one
+        submit_event = msg.submit(
+            respond_fn,
             inputs=[msg, chatbot],
-            outputs=[msg, chatbot]
+            outputs=[msg, chatbot],
+            cancels=[click_event]
         )
+        submit_btn.click(None, cancels=[submit_event])
+        
+        # Gradio cancels the running events, `stop_generation` also stops generations running in a worker thread
+        stop_btn.click(self.stop_generation, cancels=[click_event, submit_event])
+        clear_btn.click(self.clear_session, cancels=[click_event, submit_event])
+        
+        # Closing the page stops its generation, so the provider doesn't generate tokens nobody reads
+        interface.unload(self.stop_generation)
 
             # Export event handlers
         def format_last_response(chat_history):
@@ -174,7 +531,7 @@ def build_interface(self:GradioChat) -> gr.Blocks:
         # File download functionality
         def download_chat(chat_history):
             md_content = format_full_conversation(chat_history)
-            temp_dir = tempfile.gettempdir()
+            temp_dir = tempfile.mkdtemp(prefix="gradiochat-") # A directory of its own, so concurrent exports don't overwrite each other
             filename = f"conversation_{datetime.today().strftime('%Y-%m-%d')}.md"
             filepath = Path(temp_dir) / filename
             
@@ -185,29 +542,58 @@ def build_interface(self:GradioChat) -> gr.Blocks:
 
             return filepath
 
-        download_btn.click(
-            fn=download_chat,
-            inputs=[chatbot],
-            outputs=[download_btn]
-        )
+        # Export the logged conversation when there is a log
+        if log_config is None:
+            download_btn.click(
+                fn=download_chat,
+                inputs=[chatbot],
+                outputs=[download_btn]
+            )
+        else:
+            # Before the page load assigned a conversation id, the chat in the browser is exported
+            def download_logged_chat(conversation_id, chat_history):
+                return download_chat(self.export_history(conversation_id, chat_history))
+            
+            download_btn.click(
+                fn=download_logged_chat,
+                inputs=[conversation_id, chatbot],
+                outputs=[download_btn]
+            )
             
         # Initialize with starter prompt if available
         if self.app.config.starter_prompt:
             chatbot.value = [{"role": "assistant", "content": self.app.config.starter_prompt}]
         
+        if log_config is not None:
+            interface.load(self.resume_conversation, inputs=[conversation_id], outputs=[chatbot, conversation_id])
+            clear_btn.click(self.new_conversation, outputs=[conversation_id])
+            interface.unload(self.forget_conversation)
+        
+        # Sessions don't share state, so the queue can handle several chat requests at once
+        interface.queue(default_concurrency_limit=self.app.config.concurrency_limit)
+        
         self.interface = interface
         return interface
 
-# %% ../../nbs/02_ui.ipynb 11
+# %% ../../nbs/02_ui.ipynb 16
 @patch
 def launch(self:GradioChat, **kwargs):
     """Launch the Gradio interface"""
     if self.interface is None:
         self.build_interface()
     
-    return self.interface.launch(**kwargs)
+    if self.app.config.metrics_path is None:
+        return self.interface.launch(**kwargs)
+    
+    # Start the server without blocking, so the metrics endpoint can be added to it
+    block = not kwargs.pop("prevent_thread_lock", False)
+    result = self.interface.launch(prevent_thread_lock=True, **kwargs)
+    mount_metrics(self.interface.app, self.app.config.metrics_path)
+    if block:
+        self.interface.block_thread()
+    return result
 
-# %% ../../nbs/02_ui.ipynb 14
+# %% ../../nbs/02_ui.ipynb 19
 def create_chat_app(
         config: ChatAppConfig # Instance from the config.ChatAppConfig module
         ) -> GradioChat:
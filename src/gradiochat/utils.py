@@ -9,7 +9,6 @@ __all__ = ['pydantic_to_markdown_table']
 import inspect
 from typing import Type, Any, Optional, Union, get_type_hints, get_origin, get_args
 from pydantic import BaseModel, Field
-from IPython.display import Markdown, display
 
 # %% ../../nbs/97_gradiochat_utils.ipynb 4
 def pydantic_to_markdown_table(model_class: Type[BaseModel]) -> None:
@@ -95,6 +94,8 @@ def pydantic_to_markdown_table(model_class: Type[BaseModel]) -> None:
         # Add row to table
         table += f"| `{field_name}` | `{type_str}` | {default_value} | {description} |\n"
     
+    # Only needed in notebooks, so IPython isn't imported with the package
+    from IPython.display import Markdown, display
     return display(Markdown(md_name + md_docstring + table))
     # return table
 